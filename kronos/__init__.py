@@ -10,6 +10,14 @@ multi-threaded/multi-process environments
 __version__ = "1.0.4"
 
 from .logger import Logger
-from .rate_limiter import RateLimiter
+from .rate_limiter import RateLimiter, Reservation, RateLimiterHandle
+from .async_rate_limiter import AsyncRateLimiter
+from .keyed_rate_limiter import KeyedRateLimiter
+from .bandwidth_limiter import BandwidthLimiter
+from .limiter_server import LimiterServer
+from .timer_wheel import TimerWheel
+from .rate_limited_executor import RateLimitedExecutor, AsyncRateLimitedExecutor
+from .decorators import rate_limited
+from .utils.clock import SimulatedClock
 
-__all__ = ["Logger", "RateLimiter"]
\ No newline at end of file
+__all__ = ["Logger", "RateLimiter", "Reservation", "RateLimiterHandle", "AsyncRateLimiter", "KeyedRateLimiter", "BandwidthLimiter", "LimiterServer", "TimerWheel", "RateLimitedExecutor", "AsyncRateLimitedExecutor", "rate_limited", "SimulatedClock"]
\ No newline at end of file
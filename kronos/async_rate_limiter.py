@@ -0,0 +1,233 @@
+import time, asyncio
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from .rate_limiter import RateLimiter
+from .utils.buckets import check_cost
+from .utils.clock import SYSTEM_CLOCK
+
+
+class AsyncRateLimiter(RateLimiter):
+    """
+    Asyncio rate limiter with the same limit and time period semantics as RateLimiter
+    Waiting coroutines are suspended on futures that a single loop timer wakes in FIFO order
+    An instance should be awaited from a single event loop
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize rate limiter, accepting the same arguments as RateLimiter except priorities and clock
+        """
+        super().__init__(*args, **kwargs)
+        if self._lanes is not None:
+            raise ValueError("Priorities are not supported by AsyncRateLimiter")
+        if self._clock is not SYSTEM_CLOCK:
+            raise ValueError("AsyncRateLimiter waits on the event loop and does not support a clock")
+        # Reservations are handed out in increasing order, so the queue stays sorted by wake time
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Threads and processes share a real semaphore, coroutines of a single loop only need a cooperative one
+        if self._concurrency is not None and not self._multiprocessing_mode:
+            self._concurrency = _AsyncSemaphore(self._max_concurrency)
+
+    async def acquire(self, cost: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Suspend until a request can be made without exceeding the rate limit, nor the concurrency limit if set
+
+        Args:
+            cost: Number of permits the request consumes, all reserved at once
+            timeout: Maximum time to wait in seconds. Since the rate limit wait is known upfront, a request that
+                would wait longer returns False right away without consuming any permit
+
+        Returns:
+            True when the request can proceed, False if it would have to wait longer than timeout
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst)
+        """
+        check_cost(self._bucket, cost)
+        started = time.monotonic_ns()
+
+        contended = False
+        if self._concurrency is not None and not self._concurrency.acquire(False):
+            contended = True
+            if not await self._wait_concurrency(timeout):
+                return False
+
+        max_wait = None if timeout is None else max(0, int(timeout * 1_000_000_000) - (time.monotonic_ns() - started))
+        if self._remote is not None:
+            now, granted_at = await self._reserve_remote(cost, max_wait)
+        else:
+            now, granted_at = self._reserve(cost, max_wait)
+        if max_wait is not None and granted_at - now > max_wait:
+            self.release()
+            return False
+
+        if contended or granted_at > now:
+            self._record_queued(granted_at - started)
+        if granted_at <= now:
+            return True
+
+        if self._logger:
+            self._logger.debug(f"AsyncRateLimiter triggered for {(granted_at - now) / 1e9:.2f} seconds")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append((granted_at, future))
+        if self._timer is None:
+            self._schedule_wake(loop, now)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        return True
+
+    async def _wait_concurrency(self, timeout: Optional[float]) -> bool:
+        """
+        Wait for a concurrency slot
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True once a slot is taken, False on timeout
+        """
+        if isinstance(self._concurrency, _AsyncSemaphore):
+            return await self._concurrency.wait(timeout)
+
+        # Process-shared semaphores can only block, so they are waited on from the default executor
+        blocking = asyncio.get_running_loop().run_in_executor(None, self._concurrency.acquire, True, timeout)
+        try:
+            return await asyncio.shield(blocking)
+        except asyncio.CancelledError:
+            blocking.add_done_callback(lambda done: done.result() and self.release())
+            raise
+
+    async def _reserve_remote(self, cost: int, max_wait: Optional[int]) -> Tuple[int, int]:
+        """
+        Reserve permits on the limiter server without blocking the loop during the round trip
+
+        Args:
+            cost: Number of permits to reserve
+            max_wait: Longest wait in nanoseconds the caller accepts, None for no limit
+
+        Returns:
+            Tuple containing (now, granted_at) in monotonic nanoseconds
+        """
+        # The client socket can only block, so the request is sent from the default executor
+        blocking = asyncio.get_running_loop().run_in_executor(None, self._remote.reserve, cost, max_wait)
+        try:
+            return await asyncio.shield(blocking)
+        except BaseException:
+            # Permits the server already granted lapse on their own, only the concurrency slot is given back
+            self.release()
+            raise
+
+    def _schedule_wake(self, loop: asyncio.AbstractEventLoop, now: int) -> None:
+        """
+        Arm the loop timer for the first pending waiter
+
+        Args:
+            loop: Event loop the waiters belong to
+            now: Current monotonic time in nanoseconds
+        """
+        self._timer = loop.call_later((self._waiters[0][0] - now) / 1e9, self._wake, loop)
+
+    def _wake(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Release every waiter whose reservation is due and re-arm the timer for the next one
+
+        Args:
+            loop: Event loop the waiters belong to
+        """
+        self._timer = None
+        now = time.monotonic_ns()
+        while self._waiters and self._waiters[0][0] <= now:
+            _, future = self._waiters.popleft()
+            # Cancelled waiters simply give up their reservation
+            if not future.done():
+                future.set_result(True)
+
+        if self._waiters:
+            self._schedule_wake(loop, now)
+
+    def _handle_state(self) -> dict:
+        """Attributes a worker needs to reattach to the shared state, without the waiters of this event loop"""
+        return dict(super()._handle_state(), _waiters=deque(), _timer=None)
+
+    async def __aenter__(self):
+        """Async context manager support"""
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit - releases the concurrency slot, if any"""
+        self.release()
+
+    def __enter__(self):
+        """Blocking context manager is not available on the asyncio limiter"""
+        raise TypeError("AsyncRateLimiter must be used with 'async with'")
+
+
+class _AsyncSemaphore:
+    """
+    Bounded semaphore for coroutines of a single event loop, handing released slots to waiters in FIFO order
+    Exposes the non-blocking acquire and the release of threading semaphores so RateLimiter can use it as is
+    """
+    def __init__(self, value: int):
+        """
+        Args:
+            value: Number of slots
+        """
+        self._value = value
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def acquire(self, blocking: bool = False) -> bool:
+        """
+        Take a slot if one is free and nobody is queued for it
+
+        Args:
+            blocking: Only False is supported, use wait() to block
+
+        Returns:
+            True if a slot was taken
+        """
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return True
+        return False
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Queue for a slot
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True once a slot is taken, False on timeout
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # The slot may have been handed over right as the waiter was cancelled
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Give a slot back, directly to the first live waiter if any"""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(True)
+                return
+        self._value += 1
\ No newline at end of file
@@ -0,0 +1,142 @@
+from typing import Iterable, Iterator, Optional
+
+from .logger import Logger
+from .rate_limiter import RateLimiter, RateLimiterHandle
+from .keyed_rate_limiter import KeyedRateLimiter
+
+
+class BandwidthLimiter(RateLimiter):
+    """
+    Rate limiter counting bytes instead of requests, on the token bucket of RateLimiter with one permit per byte
+    Transfers are charged once their size is known, either after the fact or chunk by chunk while streaming,
+    possibly beyond the burst: the bucket then goes into debt and the next transfer waits until it is paid back
+    Transfers can also be accounted to a key, such as their host, each key then being capped on its own
+    """
+    def __init__(self, rate: int, time_period: int = 1, multiprocessing_mode: bool = False, logger: Optional[Logger] = None, backend: str = "shared_memory", burst: Optional[int] = None, name: Optional[str] = None, clock=None, snapshot_path: Optional[str] = None, snapshot_interval: Optional[float] = None, key_rate: Optional[int] = None, key_burst: Optional[int] = None, max_keys: int = 10000, mp_context=None):
+        """
+        Initialize bandwidth limiter
+
+        Args:
+            rate: Maximum number of bytes in the time period, resolved down to one byte per nanosecond
+            time_period: Time period in seconds
+            multiprocessing_mode: True if this is used in a multiprocessing task
+            logger: Optional logger instance for reporting throttling events
+            backend: State storage, either "shared_memory", "manager" or "file", see RateLimiter
+            burst: Number of bytes that can be transferred back to back (defaults to rate)
+            name: Name of the state file for the "file" backend
+            clock: Clock providing monotonic_ns() and sleep(), see RateLimiter
+            snapshot_path: File the state is saved to and restored from, see RateLimiter
+            snapshot_interval: Seconds between periodic saves of the snapshot
+            key_rate: Maximum number of bytes per key in the time period, enabling the key argument of consume().
+                Per-key states live in the table of a KeyedRateLimiter, in shared memory in multiprocessing mode
+            key_burst: Number of bytes a key can transfer back to back (defaults to key_rate)
+            max_keys: Number of keys tracked at once, see KeyedRateLimiter
+            mp_context: Multiprocessing context the processes using the limiter are started from, see RateLimiter
+
+        Raises:
+            ValueError: If backend, burst or key_burst is invalid
+        """
+        if backend == "remote":
+            raise ValueError("BandwidthLimiter does not support the remote backend, which cannot charge transfers after the fact")
+        super().__init__(rate, time_period, multiprocessing_mode, logger, backend, "token_bucket", burst, name=name, clock=clock, snapshot_path=snapshot_path, snapshot_interval=snapshot_interval, mp_context=mp_context)
+        self._keys = KeyedRateLimiter(key_rate, time_period, multiprocessing_mode, burst=key_burst, max_keys=max_keys, clock=clock, mp_context=mp_context) if key_rate else None
+
+    def consume(self, size: int, block: bool = True, key: Optional[str] = None) -> float:
+        """
+        Charge a transfer of `size` bytes that already happened
+
+        Args:
+            size: Number of bytes transferred
+            block: Whether to wait until the bucket is out of debt, so the caller cannot transfer more before then
+            key: Key the transfer is also accounted to, such as its host, when the limiter was created with key_rate
+
+        Returns:
+            Seconds until both the bucket and the key are out of debt, waited for if block is True
+
+        Raises:
+            ValueError: If a key is given without key_rate
+        """
+        if key is not None and self._keys is None:
+            raise ValueError("BandwidthLimiter keys require key_rate")
+        if size <= 0:
+            return 0.0
+
+        slots = self._storage.slots
+        with self._storage.lock:
+            now = self._clock.monotonic_ns()
+            self._bucket.commit(slots, now, size)
+            # Without any permit requested, earliest is when the bucket holds no debt anymore
+            paid_at = self._bucket.earliest(slots, now, 0)
+        if key is not None:
+            paid_at = max(paid_at, self._keys._charge(key, size)[1])
+
+        wait_time = (paid_at - now) / 1e9
+        if block and wait_time > 0:
+            self._record_queued(paid_at - now)
+            if self._logger:
+                self._logger.debug(f"BandwidthLimiter triggered for {wait_time:.2f} seconds after {size} bytes")
+            self._clock.sleep(wait_time)
+        return wait_time
+
+    def iter_chunks(self, chunks: Iterable[bytes], key: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Throttle a stream, charging each chunk before handing it over
+
+        Args:
+            chunks: Chunks of the stream
+            key: Key the stream is also accounted to, see consume()
+
+        Yields:
+            Each chunk, once the bandwidth allows for it
+        """
+        for chunk in chunks:
+            self.consume(len(chunk), key=key)
+            yield chunk
+
+    def iter_response(self, response, chunk_size: int = 65536, key: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Throttle the body of a streamed HTTP response
+
+        Args:
+            response: HTTP response object (from requests library) opened with stream=True
+            chunk_size: Number of bytes read at once
+            key: Key the response is also accounted to, see consume()
+
+        Yields:
+            Chunks of the body, once the bandwidth allows for them
+        """
+        yield from self.iter_chunks(response.iter_content(chunk_size), key)
+
+    def consume_response(self, response, block: bool = True, key: Optional[str] = None) -> float:
+        """
+        Charge the body of an HTTP response that was already read
+
+        Args:
+            response: HTTP response object (from requests library)
+            block: Whether to wait until the bucket is out of debt
+            key: Key the response is also accounted to, see consume()
+
+        Returns:
+            Seconds until both the bucket and the key are out of debt
+        """
+        return self.consume(len(response.content), block, key)
+
+    def handle(self) -> RateLimiterHandle:
+        """
+        Get a lightweight handle to this limiter, see RateLimiter
+
+        Returns:
+            Handle of this limiter
+
+        Raises:
+            ValueError: If the limiter has a per-key table, whose locks can only be inherited, or RateLimiter.handle() would
+        """
+        if self._keys is not None:
+            raise ValueError("Handles of BandwidthLimiter do not support key_rate, whose per-key table can only be inherited")
+        return super().handle()
+
+    def close(self) -> None:
+        """Release the limiter state, including the per-key table if set"""
+        if self._keys is not None:
+            self._keys.close()
+        super().close()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import functools, inspect
+from typing import Any, Callable, Optional, Union
+
+from .rate_limiter import RateLimiter
+from .async_rate_limiter import AsyncRateLimiter
+from .keyed_rate_limiter import KeyedRateLimiter
+from .timer_wheel import TimerWheel
+from .utils.buckets import check_cost
+
+
+def rate_limited(limiter: Union[RateLimiter, KeyedRateLimiter], key: Optional[Callable[..., str]] = None, cost: int = 1) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function so that every call first takes its permits from a rate limiter
+    Coroutine functions wait on the event loop instead of blocking it: through AsyncRateLimiter.acquire, or by
+    sleeping until their reservation is due with KeyedRateLimiter. Everything that can be decided once is decided
+    when decorating, so a call whose permits are available only adds the limiter fast path to the function call
+
+    Args:
+        limiter: Limiter the calls are accounted to, a KeyedRateLimiter when key is given
+        key: Function receiving the call arguments and returning the key the call is accounted to, e.g. its host
+        cost: Number of permits each call consumes
+
+    Returns:
+        Decorator
+
+    Raises:
+        ValueError: If cost is below 1 or above the limit (or burst)
+        TypeError: If the limiter does not fit the key or the function, e.g. a RateLimiter for a coroutine function
+
+    Example:
+        @rate_limited(KeyedRateLimiter(10, 1), key=lambda host, path: host)
+        async def fetch(host, path): ...
+    """
+    if (key is None) == isinstance(limiter, KeyedRateLimiter):
+        raise TypeError("rate_limited requires a KeyedRateLimiter exactly when a key function is given")
+    check_cost(limiter._bucket, cost)
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            wrapper = _async_wrapper(fn, limiter, key, cost)
+        elif isinstance(limiter, AsyncRateLimiter):
+            raise TypeError(f"AsyncRateLimiter can only limit coroutine functions, not {fn.__qualname__}")
+        else:
+            wrapper = _sync_wrapper(fn, limiter, key, cost)
+        return functools.wraps(fn)(wrapper)
+
+    return decorator
+
+
+def _sync_wrapper(fn: Callable, limiter: Union[RateLimiter, KeyedRateLimiter], key: Optional[Callable[..., str]], cost: int) -> Callable:
+    """
+    Build the wrapper of a regular function
+
+    Args:
+        fn: Decorated function
+        limiter: Limiter the calls are accounted to
+        key: Function returning the key of a call, or None
+        cost: Number of permits each call consumes
+
+    Returns:
+        Wrapper blocking the calling thread until the permits are granted
+    """
+    if key is not None:
+        def wrapper(*args, **kwargs) -> Any:
+            limiter.acquire(key(*args, **kwargs), cost)
+            return fn(*args, **kwargs)
+
+    elif limiter._concurrency is not None:
+        def wrapper(*args, **kwargs) -> Any:
+            limiter.acquire(cost)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                limiter.release()
+
+    else:
+        def wrapper(*args, **kwargs) -> Any:
+            limiter.acquire(cost)
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _async_wrapper(fn: Callable, limiter: Union[RateLimiter, KeyedRateLimiter], key: Optional[Callable[..., str]], cost: int) -> Callable:
+    """
+    Build the wrapper of a coroutine function
+
+    Args:
+        fn: Decorated coroutine function
+        limiter: Limiter the calls are accounted to
+        key: Function returning the key of a call, or None
+        cost: Number of permits each call consumes
+
+    Returns:
+        Coroutine function suspending the calling task until the permits are granted
+
+    Raises:
+        TypeError: If the limiter is a RateLimiter other than AsyncRateLimiter, whose lanes, concurrency slots and
+            file or remote backends would block the event loop
+    """
+    if isinstance(limiter, AsyncRateLimiter):
+        async def wrapper(*args, **kwargs) -> Any:
+            await limiter.acquire(cost)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                limiter.release()
+        return wrapper
+
+    if key is None:
+        raise TypeError(f"RateLimiter would block the event loop of {fn.__qualname__}, use AsyncRateLimiter")
+
+    # Keyed states sit in memory, so reserving never blocks and only the wait needs the event loop, on its timer wheel
+    async def wrapper(*args, **kwargs) -> Any:
+        delay = limiter.reserve(key(*args, **kwargs), cost).delay
+        if delay > 0:
+            await TimerWheel.running().sleep(delay)
+        return await fn(*args, **kwargs)
+
+    return wrapper
\ No newline at end of file
@@ -0,0 +1,261 @@
+import hashlib
+from typing import Optional, Sequence, Tuple
+
+from .logger import Logger
+from .rate_limiter import Reservation
+from .utils.buckets import create_bucket, check_cost
+from .utils.clock import SYSTEM_CLOCK
+from .utils.http import parse_rate_limit_headers
+from .utils.storage import LocalStorage, SharedMemoryStorage
+
+
+class KeyedRateLimiter:
+    """
+    Rate limiter keeping an independent limit per key, such as an upstream host or API key
+    Per-key states live in a fixed-capacity hash table split into segments, each guarded by its own lock
+    States that no longer constrain anything are reclaimed on lookup, and when a neighbourhood is full the
+    state closest to expiring is evicted, so memory stays bounded by max_keys however many keys are seen
+    """
+    _SEGMENTS = 16
+    _PROBES = 8
+
+    def __init__(self, limit: int, time_period: int, multiprocessing_mode: bool = False, logger: Optional[Logger] = None, algorithm: str = "token_bucket", burst: Optional[int] = None, windows: Optional[Sequence[Tuple[int, float]]] = None, adaptive: bool = False, max_keys: int = 10000, clock=None, mp_context=None):
+        """
+        Initialize keyed rate limiter
+
+        Args:
+            limit: Maximum number of requests allowed per key in the time period
+            time_period: Time period in seconds
+            multiprocessing_mode: True if this is used in a multiprocessing task, keeping the table in shared memory
+            logger: Optional logger instance for reporting rate limit events
+            algorithm: Either "token_bucket", "sliding_window_counter", "sliding_window" or "pacing", see RateLimiter.
+                The constant-memory token bucket is the default, since "sliding_window" sizes every entry after limit
+            burst: Token bucket capacity (defaults to limit, or 1 for "pacing")
+            windows: Additional (limit, time_period) windows enforced per key, see RateLimiter
+            adaptive: Whether to also follow upstream feedback per key, see RateLimiter
+            max_keys: Number of keys tracked at once. The table takes max_keys * (size of one state + 1) * 8 bytes,
+                where a state is one slot for "token_bucket" and "pacing", three for "sliding_window_counter" and limit + 2 for "sliding_window"
+            clock: Clock providing monotonic_ns() and sleep(), see RateLimiter
+            mp_context: Multiprocessing context the processes using the limiter are started from, see RateLimiter
+
+        Raises:
+            ValueError: If limit, time_period, algorithm or burst is invalid
+        """
+        self._limit = limit
+        self._time_period = time_period
+        self._logger = logger
+        self._clock = SYSTEM_CLOCK if clock is None else clock
+
+        self._bucket = create_bucket(limit, int(time_period * 1_000_000_000), algorithm, burst, windows, adaptive)
+        self._adaptive = self._bucket.buckets[-1] if adaptive else None
+        # Each entry holds the key hash followed by its state
+        self._stride = 1 + self._bucket.size
+        self._entries = max(self._PROBES, -(-max_keys // self._SEGMENTS))
+
+        if multiprocessing_mode:
+            self._segments = [SharedMemoryStorage(self._entries * self._stride, mp_context) for _ in range(self._SEGMENTS)]
+        else:
+            self._segments = [LocalStorage(self._entries * self._stride) for _ in range(self._SEGMENTS)]
+
+        if self._logger:
+            mode = "Multiprocessing" if multiprocessing_mode else "Multithreading"
+            self._logger.info(f"{mode} KeyedRateLimiter initialized with {limit} requests per {time_period} seconds for up to {max_keys} keys")
+
+    def acquire(self, key: str, cost: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until a request for the key can be made without exceeding its rate limit
+
+        Args:
+            key: Key the request is accounted to
+            cost: Number of permits the request consumes, all reserved at once
+            timeout: Maximum time to wait in seconds. Since the wait is known upfront, a request that would
+                wait longer returns False right away without consuming any permit
+
+        Returns:
+            True when the request can proceed, False if it would have to wait longer than timeout
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst)
+        """
+        check_cost(self._bucket, cost)
+        max_wait = None if timeout is None else int(timeout * 1_000_000_000)
+        now, granted_at = self._reserve(key, cost, max_wait)
+        if max_wait is not None and granted_at - now > max_wait:
+            return False
+
+        wait_time = (granted_at - now) / 1e9
+        if wait_time > 0:
+            if self._logger:
+                self._logger.debug(f"KeyedRateLimiter triggered for {wait_time:.2f} seconds on {key}")
+            self._clock.sleep(wait_time)
+        return True
+
+    def try_acquire(self, key: str, cost: int = 1) -> bool:
+        """
+        Take permits for the key only if they are available right now, never waiting
+
+        Args:
+            key: Key the request is accounted to
+            cost: Number of permits the request consumes
+
+        Returns:
+            True when the request can proceed, False otherwise
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst)
+        """
+        check_cost(self._bucket, cost)
+        now, granted_at = self._reserve(key, cost, 0)
+        return granted_at <= now
+
+    def reserve(self, key: str, cost: int = 1) -> Reservation:
+        """
+        Reserve permits for the key without waiting for them
+
+        Args:
+            key: Key the request is accounted to
+            cost: Number of permits the request consumes
+
+        Returns:
+            Reservation holding the time at which the request may proceed
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst)
+        """
+        check_cost(self._bucket, cost)
+        _, granted_at = self._reserve(key, cost)
+        return Reservation(granted_at, cost, self._clock)
+
+    def feedback(self, key: str, response) -> None:
+        """
+        Adapt the rate of a key to an HTTP response from its upstream
+
+        Args:
+            key: Key the response is accounted to
+            response: HTTP response object (from requests library)
+
+        Raises:
+            RuntimeError: If the limiter was not created with adaptive=True
+        """
+        if self._adaptive is None:
+            raise RuntimeError("KeyedRateLimiter feedback requires adaptive=True")
+
+        info = parse_rate_limit_headers(response)
+        key_hash = _hash_key(key)
+        position = key_hash & 0xFFFFFFFFFFFFFFFF
+        segment = self._segments[position % self._SEGMENTS]
+
+        with segment.lock:
+            now = self._clock.monotonic_ns()
+            state = self._lookup(segment.slots, key_hash, position // self._SEGMENTS, now)
+            self._adaptive.feedback(state, now, **info)
+
+    def _reserve(self, key: str, cost: int, max_wait: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Reserve the next `cost` permits for the key, only locking the segment the key hashes to
+
+        Args:
+            key: Key the request is accounted to
+            cost: Number of permits
+            max_wait: Maximum wait in nanoseconds, permits due later than that are not reserved
+
+        Returns:
+            Tuple containing (now, granted_at) in monotonic nanoseconds
+        """
+        key_hash = _hash_key(key)
+        position = key_hash & 0xFFFFFFFFFFFFFFFF
+        segment = self._segments[position % self._SEGMENTS]
+
+        with segment.lock:
+            now = self._clock.monotonic_ns()
+            state = self._lookup(segment.slots, key_hash, position // self._SEGMENTS, now)
+            granted_at = self._bucket.earliest(state, now, cost)
+            if max_wait is None or granted_at - now <= max_wait:
+                self._bucket.commit(state, granted_at, cost)
+
+        return now, granted_at
+
+    def _charge(self, key: str, cost: int) -> Tuple[int, int]:
+        """
+        Commit permits for the key right away, possibly beyond its burst, for usage known only after the fact
+
+        Args:
+            key: Key the usage is accounted to
+            cost: Number of permits used
+
+        Returns:
+            Tuple containing (now, paid_at) in monotonic nanoseconds, paid_at being when the key is out of debt
+        """
+        key_hash = _hash_key(key)
+        position = key_hash & 0xFFFFFFFFFFFFFFFF
+        segment = self._segments[position % self._SEGMENTS]
+
+        with segment.lock:
+            now = self._clock.monotonic_ns()
+            state = self._lookup(segment.slots, key_hash, position // self._SEGMENTS, now)
+            self._bucket.commit(state, now, cost)
+            # Without any permit requested, earliest is when the key holds no debt anymore
+            paid_at = self._bucket.earliest(state, now, 0)
+
+        return now, paid_at
+
+    def _lookup(self, slots: memoryview, key_hash: int, position: int, now: int) -> memoryview:
+        """
+        Find the state of a key in a segment, claiming an entry for it if it has none
+
+        Args:
+            slots: Segment slots, with the segment lock held
+            key_hash: Stable hash of the key
+            position: Position of the key in the segment, before probing
+            now: Current monotonic time in nanoseconds
+
+        Returns:
+            Writable view over the state slots of the key
+        """
+        stride = self._stride
+        free = None
+        victim = None
+        victim_expiry = None
+
+        for probe in range(self._PROBES):
+            base = (position + probe) % self._entries * stride
+            entry_hash = slots[base]
+            if entry_hash == key_hash:
+                return slots[base + 1:base + stride]
+            if free is not None:
+                continue
+            if entry_hash == 0:
+                free = base
+                continue
+            expiry = self._bucket.expires_at(slots[base + 1:base + stride])
+            if expiry <= now:
+                free = base
+            elif victim is None or expiry < victim_expiry:
+                victim = base
+                victim_expiry = expiry
+
+        # Reset the claimed entry to a fresh state
+        base = free if free is not None else victim
+        slots[base] = key_hash
+        for i in range(base + 1, base + stride):
+            slots[i] = 0
+        return slots[base + 1:base + stride]
+
+    def close(self) -> None:
+        """Release the limiter state"""
+        for segment in self._segments:
+            segment.close()
+
+
+def _hash_key(key: str) -> int:
+    """
+    Hash a key identically in every process, unlike the salted built-in hash
+
+    Args:
+        key: Key to hash
+
+    Returns:
+        Non-zero signed 64-bit hash, since zero marks empty entries
+    """
+    key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little", signed=True)
+    return key_hash or 1
\ No newline at end of file
@@ -0,0 +1,192 @@
+import os, json, time, asyncio, argparse, threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from .logger import Logger
+from .utils.buckets import Bucket, create_bucket, lease_permits
+from .utils.remote import Address, REQUEST, RESPONSE, MAX_PAYLOAD, OP_OPEN, OP_RESERVE, OP_LEASE, STATUS_OK, STATUS_MISMATCH, STATUS_UNKNOWN_BUCKET, STATUS_INVALID
+from .utils.storage import LocalStorage
+
+# Largest state a client may open a bucket with, 8MB
+MAX_BUCKET_SLOTS = 1 << 20
+
+
+class LimiterServer:
+    """
+    Limiter daemon holding named buckets for RateLimiter clients with backend="remote", on any number of hosts
+    Serves every connection from a single asyncio loop, where each request takes constant work and never waits,
+    since clients sleep on their side until the reservation they are handed is due
+    """
+    def __init__(self, address: Address, logger: Optional[Logger] = None):
+        """
+        Initialize limiter server
+
+        Args:
+            address: (host, port) tuple to listen on TCP, or a UNIX socket path
+            logger: Optional logger instance for reporting server events
+        """
+        self._address = address
+        self._logger = logger
+        self._buckets: List[Tuple[Bucket, memoryview]] = []
+        self._names: Dict[str, Tuple[int, dict]] = {}
+        self._connections: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def serve_forever(self) -> None:
+        """Serve clients until stop() is called"""
+        asyncio.run(self._serve())
+
+    def start(self) -> None:
+        """Serve clients from a background thread, returning once the server is listening"""
+        self._thread = threading.Thread(target=self.serve_forever, name="kronos-limiter-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        """Stop serving, closing every connection"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def _serve(self) -> None:
+        """Listen until stopped"""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if isinstance(self._address, str):
+            if os.path.exists(self._address):
+                os.unlink(self._address)
+            server = await asyncio.start_unix_server(self._handle, self._address)
+        else:
+            server = await asyncio.start_server(self._handle, *self._address)
+
+        if self._logger:
+            self._logger.info(f"LimiterServer listening on {self._address}")
+        self._ready.set()
+
+        async with server:
+            await self._stopping.wait()
+            for connection in self._connections:
+                connection.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        self._loop = None
+        if isinstance(self._address, str) and os.path.exists(self._address):
+            os.unlink(self._address)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answer the requests of a connection in order, without waiting for the client to read each response
+
+        Args:
+            reader: Connection reader
+            writer: Connection writer
+        """
+        self._connections.add(asyncio.current_task())
+        try:
+            while True:
+                op, request_id, bucket_id, count, max_wait = REQUEST.unpack(await reader.readexactly(REQUEST.size))
+                if op == OP_OPEN:
+                    if count > MAX_PAYLOAD:
+                        # The rest of the stream cannot be trusted to be framed anymore
+                        writer.write(RESPONSE.pack(request_id, STATUS_INVALID, 0, 0))
+                        await writer.drain()
+                        break
+                    status, count, wait = self._open(await reader.readexactly(count))
+                else:
+                    status, count, wait = self._reserve(op, bucket_id, count, None if max_wait < 0 else max_wait)
+                writer.write(RESPONSE.pack(request_id, status, count, wait))
+                if writer.transport.get_write_buffer_size() > 65536:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(asyncio.current_task())
+            writer.close()
+
+    def _open(self, payload: bytes) -> Tuple[int, int, int]:
+        """
+        Find a bucket by name, creating it on first use
+
+        Args:
+            payload: JSON object holding the name and the RateLimiter configuration of the bucket
+
+        Returns:
+            Tuple containing (status, bucket id, 0)
+        """
+        try:
+            config = json.loads(payload)
+            name = config.pop("name")
+            if name in self._names:
+                bucket_id, existing = self._names[name]
+                return (STATUS_OK, bucket_id, 0) if config == existing else (STATUS_MISMATCH, 0, 0)
+
+            period_ns = int(config["time_period"] * 1_000_000_000)
+            bucket = create_bucket(config["limit"], period_ns, config["algorithm"], config["burst"], config["windows"])
+            # Configurations come from any client, so they must not make the server allocate without bound
+            if not 0 < bucket.size <= MAX_BUCKET_SLOTS:
+                return STATUS_INVALID, 0, 0
+            slots = LocalStorage(bucket.size).slots
+        except (ValueError, KeyError, TypeError, AttributeError, OverflowError):
+            return STATUS_INVALID, 0, 0
+
+        self._buckets.append((bucket, slots))
+        self._names[name] = (len(self._buckets) - 1, config)
+        if self._logger:
+            self._logger.info(f"LimiterServer opened bucket {name} with {config['limit']} requests per {config['time_period']} seconds")
+        return STATUS_OK, len(self._buckets) - 1, 0
+
+    def _reserve(self, op: int, bucket_id: int, count: int, max_wait: Optional[int]) -> Tuple[int, int, int]:
+        """
+        Reserve permits of a bucket
+
+        OP_RESERVE reserves `count` permits together. OP_LEASE grants up to `count` single permits that are available
+        right away, or when none is, reserves a single one like OP_RESERVE would
+
+        Args:
+            op: OP_RESERVE or OP_LEASE
+            bucket_id: Bucket id returned by OP_OPEN
+            count: Number of permits
+            max_wait: Maximum wait in nanoseconds, permits due later than that are not reserved
+
+        Returns:
+            Tuple containing (status, number of permits reserved, wait until they are due in nanoseconds)
+        """
+        if bucket_id >= len(self._buckets):
+            return STATUS_UNKNOWN_BUCKET, 0, 0
+        bucket, slots = self._buckets[bucket_id]
+        if count < 1 or (op == OP_RESERVE and count > bucket.capacity) or op not in (OP_RESERVE, OP_LEASE):
+            return STATUS_INVALID, 0, 0
+
+        now = time.monotonic_ns()
+        if op == OP_LEASE:
+            granted, granted_at = lease_permits(bucket, slots, now, count, max_wait)
+            return STATUS_OK, granted, granted_at - now
+
+        granted_at = bucket.earliest(slots, now, count)
+        if max_wait is not None and granted_at - now > max_wait:
+            return STATUS_OK, 0, granted_at - now
+        bucket.commit(slots, granted_at, count)
+        return STATUS_OK, count, granted_at - now
+
+
+def main() -> None:
+    """Run a limiter server from the command line"""
+    parser = argparse.ArgumentParser(description="Kronos limiter server")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on over TCP")
+    parser.add_argument("--port", type=int, default=7117, help="Port to listen on over TCP")
+    parser.add_argument("--unix", help="UNIX socket path to listen on instead of TCP")
+    parser.add_argument("--level", default="INFO", help="Log level")
+    args = parser.parse_args()
+
+    server = LimiterServer(args.unix or (args.host, args.port), Logger(level=args.level))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -42,7 +42,7 @@ class Logger:
         "NOTSET": 0,
     }
 
-    def __init__(self, level: Optional[int] = logging.INFO, console_level: Optional[int] = None, file_level: Optional[int] = None, log_directory: Optional[str] = None):
+    def __init__(self, level: Optional[int] = logging.INFO, console_level: Optional[int] = None, file_level: Optional[int] = None, log_directory: Optional[str] = None, clock=None):
         """
         Initialize the logger
 
@@ -51,11 +51,13 @@ class Logger:
             console_level: Specific log level for console output (defaults to level if not provided)
             file_level: Specific log level for file output (defaults to level if not provided)
             log_directory: Directory where log files will be stored. If None, only console logging is enabled
+            clock: Clock providing time() for the timestamps, such as the SimulatedClock of a rate limiter (defaults to the system clock)
         """
         self._level = self._convert_level(level)
         self._console_level = self._convert_level(console_level) if console_level is not None else self._level
         self._file_level = self._convert_level(file_level) if file_level is not None else self._level
         self._log_directory = log_directory
+        self._now = datetime.now if clock is None else lambda: datetime.fromtimestamp(clock.time())
 
         # Configure console handler
         self._console_handler = logging.StreamHandler(sys.stdout)
@@ -65,7 +67,7 @@ class Logger:
         if log_directory:
             if not os.path.exists(log_directory):
                 os.makedirs(log_directory)
-            timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+            timestamp = self._now().strftime("%Y-%m-%dT%H-%M-%S")
             log_file_path = os.path.join(log_directory, f"{timestamp}.log")
             self._file_handler = logging.FileHandler(log_file_path, mode="a", encoding="utf-8")
 
@@ -106,7 +108,7 @@ class Logger:
         Returns:
             Formatted log message
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+        timestamp = self._now().strftime("%Y-%m-%d %H:%M:%S.%f")
         level_name = self._LEVEL_NAMES.get(level, "UNKNOWN")
 
         return f"[{timestamp}] {level_name} - {process_name} / {thread_name} ({process_id}) - {module}:{filename}:{lineno} - {msg}"
@@ -0,0 +1,151 @@
+import asyncio, threading, functools
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .rate_limiter import RateLimiter
+from .timer_wheel import TimerWheel, Timer
+
+
+class RateLimitedExecutor(Executor):
+    """
+    Executor handing submitted tasks to a thread pool only once the rate limiter grants their permits
+    Submitting reserves the permits and returns a future right away, then the shared TimerWheel releases each
+    task into the pool when its reservation is due, so worker threads only ever run real work
+    """
+    def __init__(self, rate_limiter: RateLimiter, max_workers: Optional[int] = None, executor: Optional[Executor] = None, timer_wheel: Optional[TimerWheel] = None):
+        """
+        Initialize rate limited executor
+
+        Args:
+            rate_limiter: Rate limiter the tasks are accounted to
+            max_workers: Size of the thread pool created when no executor is given
+            executor: Executor running the tasks once released, which is then left running on shutdown
+            timer_wheel: Running timer wheel releasing the tasks, the one shared by the process if None
+        """
+        self._rate_limiter = rate_limiter
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers, thread_name_prefix="kronos-executor")
+        self._owns_executor = executor is None
+        self._timer_wheel = timer_wheel
+
+        self._condition = threading.Condition()
+        self._pending: Dict[Future, Timer] = {}
+        self._shutdown = False
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """
+        Schedule a task for when a permit is available
+
+        Args:
+            fn: Callable to run
+            args: Positional arguments of fn
+            kwargs: Keyword arguments of fn
+
+        Returns:
+            Future of the result of fn
+
+        Raises:
+            RuntimeError: If the executor was shut down
+        """
+        if self._timer_wheel is None:
+            self._timer_wheel = TimerWheel.shared()
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+
+            future = Future()
+            reservation = self._rate_limiter.reserve()
+            self._pending[future] = self._timer_wheel.call_at(reservation.time, self._release, future, fn, args, kwargs)
+            return future
+
+    def _release(self, future: Future, fn: Callable, args: tuple, kwargs: dict) -> None:
+        """
+        Hand a task whose reservation is due to the executor, from the timer wheel
+
+        Args:
+            future: Future returned on submission
+            fn: Callable to run
+            args: Positional arguments of fn
+            kwargs: Keyword arguments of fn
+        """
+        with self._condition:
+            if self._pending.pop(future, None) is None:
+                return
+            if not self._pending:
+                self._condition.notify_all()
+            # Cancelled futures simply give up their permits
+            if future.set_running_or_notify_cancel():
+                self._executor.submit(_run, future, fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """
+        Stop accepting tasks. Pending ones are still released when due unless cancelled
+
+        Args:
+            wait: Whether to block until every pending task has run
+            cancel_futures: Whether to cancel the tasks not released yet
+        """
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for future, timer in self._pending.items():
+                    timer.cancel()
+                    future.cancel()
+                self._pending.clear()
+            if wait:
+                self._condition.wait_for(lambda: not self._pending)
+
+        if self._owns_executor:
+            self._executor.shutdown(wait)
+
+
+class AsyncRateLimitedExecutor:
+    """
+    Asyncio counterpart of RateLimitedExecutor, running blocking callables through loop.run_in_executor
+    Coroutines wait for their reservation on the TimerWheel of the event loop, so no worker thread is held while they do
+    """
+    def __init__(self, rate_limiter: RateLimiter, executor: Optional[Executor] = None):
+        """
+        Initialize asyncio rate limited executor
+
+        Args:
+            rate_limiter: Rate limiter the calls are accounted to
+            executor: Executor running the calls, the event loop default one if None
+        """
+        self._rate_limiter = rate_limiter
+        self._executor = executor
+
+    async def run(self, fn: Callable, /, *args, **kwargs) -> Any:
+        """
+        Run a callable in the executor once a permit is available
+
+        Args:
+            fn: Callable to run
+            args: Positional arguments of fn
+            kwargs: Keyword arguments of fn
+
+        Returns:
+            Result of fn
+        """
+        delay = self._rate_limiter.reserve().delay
+        if delay > 0:
+            await TimerWheel.running().sleep(delay)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+
+def _run(future: Future, fn: Callable, args: tuple, kwargs: dict) -> None:
+    """
+    Run a released task and settle its future
+
+    Args:
+        future: Future returned on submission, already marked as running
+        fn: Callable to run
+        args: Positional arguments of fn
+        kwargs: Keyword arguments of fn
+    """
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result(result)
\ No newline at end of file
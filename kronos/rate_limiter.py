@@ -1,83 +1,624 @@
-import time, threading, multiprocessing
-from datetime import datetime, timedelta
-from typing import List, Optional
+import os, math, uuid, pickle, multiprocessing.util
+from typing import Dict, Optional, Sequence, Tuple, Union
 
 from .logger import Logger
+from .utils.buckets import Bucket, create_bucket, check_cost, lease_permits
+from .utils.clock import SYSTEM_CLOCK
+from .utils.http import parse_rate_limit_headers
+from .utils.lease import PermitLease
+from .utils.priority import PriorityLanes
+from .utils.remote import RemoteBucket
+from .utils.snapshot import SnapshotWriter, load_snapshot
+from .utils.storage import LocalStorage, SharedMemoryStorage, ManagerStorage, FileStorage, state_file_path, fingerprint
 
 
 class RateLimiter:
     """
     Rate limiter to ensure limits are respected in multithreading or multiprocessing
-    Implements a token bucket algorithm for rate limiting
+    Implements either an exact sliding window log or a constant-memory token bucket (GCRA)
+    Optionally also caps how many requests run at once, releasing a slot when the context manager exits
     """
-    def __init__(self, limit: int, time_period: int, multiprocessing_mode: bool = False, logger: Optional[Logger] = None):
+    # Slot layout of the statistics stored after the algorithm state: waits, total and longest queued time
+    _WAITS = 0
+    _QUEUED_TOTAL = 1
+    _QUEUED_MAX = 2
+    _STATISTICS_SIZE = 3
+
+    def __init__(self, limit: int, time_period: int, multiprocessing_mode: bool = False, logger: Optional[Logger] = None, backend: str = "shared_memory", algorithm: str = "sliding_window", burst: Optional[int] = None, windows: Optional[Sequence[Tuple[int, float]]] = None, adaptive: bool = False, max_concurrency: Optional[int] = None, name: Optional[str] = None, address: Optional[Union[str, Tuple[str, int]]] = None, lease: int = 1, priorities: Optional[Union[str, Sequence[float]]] = None, reserved: float = 0.0, clock=None, snapshot_path: Optional[str] = None, snapshot_interval: Optional[float] = None, mp_context=None):
         """
         Initialize rate limiter
 
         Args:
             limit: Maximum number of requests allowed in the time period
             time_period: Time period in seconds
-            multiprocessing_mode: True if this is used in a multiprocessing task
+            multiprocessing_mode: True if this is used in a multiprocessing task. The locks of the "shared_memory" backend
+                can then only be shared with processes started from mp_context, e.g. passing a limiter created with the
+                default context to multiprocessing.get_context("spawn").Process fails on Linux
             logger: Optional logger instance for reporting rate limit events
+            backend: State storage, either "shared_memory", "manager", "file" or "remote". The "shared_memory" and
+                "manager" backends only apply to multiprocessing mode, threads sharing plain memory otherwise, and
+                "manager" requires it. The "file" backend, available in both modes, keeps the state in a memory-mapped
+                file locked with flock, shared by every process on the host that opens a limiter with the same name and
+                configuration, related or not.
+                The "remote" backend, available in both modes, keeps the state on a LimiterServer shared by every
+                client on any host that opens a limiter with the same name and configuration
+            algorithm: Either "sliding_window", which never lets more than `limit` requests into any window of `time_period` seconds,
+                "sliding_window_counter", which approximates it in constant memory for very large limits by weighting the count of the
+                previous fixed window (exact for evenly spread requests, at worst 2 * limit in a window when they come in bunches),
+                "token_bucket", which refills `limit` permits per `time_period` seconds smoothly and keeps constant memory,
+                or "pacing", a token bucket spacing requests evenly every `time_period / limit` seconds instead of letting them through in bursts
+            burst: Token bucket capacity, i.e. how many requests may run back to back (defaults to limit, or 1 for "pacing").
+                Additional windows always allow a burst of their own limit
+            windows: Additional (limit, time_period) windows, e.g. [(500, 60), (20000, 86400)], all checked and committed
+                together with the main one under a single lock. With "token_bucket" or "pacing" each window takes a single slot,
+                with "sliding_window_counter" three
+            adaptive: Whether to also follow upstream feedback passed to feedback(), backing off on HTTP 429/503,
+                honoring Retry-After and X-RateLimit-Remaining/Reset, and probing back up to `limit` on success
+            max_concurrency: Maximum number of requests in flight at once. When set, each acquire takes a slot that
+                must be given back with release(), which the context manager does on exit. Not available with the "file" backend,
+                and only shared by the threads or processes of this limiter with the "remote" backend
+            name: Name of the state file for the "file" backend, placed under /dev/shm unless it is a path (a file left
+                by a previous boot is reset when opened, since its times follow the monotonic clock of that boot),
+                or of the server bucket for the "remote" backend
+            address: LimiterServer address for the "remote" backend, a (host, port) tuple or a UNIX socket path
+            lease: Largest number of permits a process takes from the shared state at once for single-permit acquires,
+                handing them out locally without locking it. The batch size adapts to demand between 1 and lease.
+                Requires "token_bucket" or "pacing": a sliding window would account leased permits when they are taken,
+                not when they are used up to 0.1 seconds later, and let up to lease - 1 permits too many into a window.
+                Leased permits lapse 0.1 seconds after being taken, unused ones being given back to the shared state
+                when it can tell them apart (always with "token_bucket") or when the process exits. Lapsed permits of
+                the "remote" backend are not given back
+            priorities: Enables acquire(priority=...), either "strict", serving lower priority values first, or a weight per
+                priority class 0..n-1, sharing the rate between classes in proportion under contention. Waiters of a process are
+                queued by priority and only the first of them holds a reservation
+            reserved: Share of the capacity (limit, or burst) kept for priority 0 across every thread and process: other classes
+                are only granted permits while that many more would still be available
+            clock: Clock providing monotonic_ns() and sleep(), such as a SimulatedClock to replay traffic without waiting
+                (defaults to the system clock). Not supported with priorities or the "remote" backend, whose waits and
+                state follow the system clock
+            snapshot_path: File the state is saved to when the limiter is closed, collected or the interpreter exits, and
+                restored from on creation if it was saved with the same configuration, so a restarted process resumes with
+                the budget its predecessor left instead of a fresh one. Shared state that is already in use is never overwritten.
+                Not supported with the "remote" backend, whose state lives on the server
+            snapshot_interval: Seconds between periodic saves of the snapshot, to also survive crashes
+            mp_context: Multiprocessing context the processes using the limiter are started from, such as
+                multiprocessing.get_context("spawn"), for the "shared_memory" and "manager" backends (defaults to the default context)
+
+        Raises:
+            ValueError: If limit, time_period, backend, algorithm, burst, windows, lease, priorities, reserved, clock or snapshot_path is invalid, or an existing state file does not match the configuration
         """
         self._limit = limit
         self._time_period = time_period
         self._logger = logger
+        self._multiprocessing_mode = multiprocessing_mode
+        self._backend = backend
+        self._handle: Optional[RateLimiterHandle] = None
+        self._max_concurrency = max_concurrency
+        self._clock = SYSTEM_CLOCK if clock is None else clock
+        if clock is not None and (priorities is not None or backend == "remote"):
+            raise ValueError("A clock is not supported with priorities or the remote backend")
+        if backend not in ("shared_memory", "manager", "file", "remote"):
+            raise ValueError(f"Invalid backend: {backend}. Valid backends are: shared_memory, manager, file, remote")
+        if backend == "manager" and not multiprocessing_mode:
+            raise ValueError("The manager backend requires multiprocessing_mode")
+        if lease > 1 and algorithm in ("sliding_window", "sliding_window_counter"):
+            raise ValueError(f"Leases are not supported by the {algorithm} algorithm, use token_bucket or pacing")
 
-        if multiprocessing_mode:
-            manager = multiprocessing.Manager()
-            self._lock = manager.Lock()
-            self._timestamps = manager.list()
-            if self._logger:
-                self._logger.info(f"Multiprocessing RateLimiter initialized with {limit} requests per {time_period} seconds")
+        period_ns = int(time_period * 1_000_000_000)
+        self._bucket = create_bucket(limit, period_ns, algorithm, burst, windows, adaptive)
+        self._adaptive = self._bucket.buckets[-1] if adaptive else None
+
+        if priorities is not None and priorities != "strict" and (not priorities or min(priorities) <= 0):
+            raise ValueError(f"Invalid priorities: {priorities}. Priorities must be \"strict\" or positive weights")
+        self._lanes = PriorityLanes(None if priorities == "strict" else priorities) if priorities is not None else None
+        self._headroom = math.ceil(reserved * self._bucket.capacity)
+        if not 0 <= self._headroom < self._bucket.capacity:
+            raise ValueError(f"Invalid reserved: {reserved}. Reserved must leave other priorities at least one permit")
+
+        self._statistics = self._bucket.size
+        windows_ns = [(window_limit, int(window_period * 1_000_000_000)) for window_limit, window_period in windows or ()]
+        size = self._bucket.size + self._STATISTICS_SIZE
+
+        self._remote = None
+        self._lease = PermitLease(lease) if lease > 1 and backend != "remote" else None
+        if backend == "remote":
+            if not name or address is None:
+                raise ValueError("The remote backend requires a name and an address")
+            if adaptive or reserved:
+                raise ValueError("Adaptive mode and reserved capacity are not supported by the remote backend")
+            config = {"limit": limit, "time_period": time_period, "algorithm": algorithm, "burst": burst, "windows": [list(window) for window in windows or ()]}
+            self._remote = RemoteBucket(address, name, config, lease)
+            # Only the statistics are kept locally
+            self._statistics = 0
+            size = self._STATISTICS_SIZE
+
+        # The file is shared by every process on the host whatever the mode
+        if backend == "file":
+            if not name:
+                raise ValueError("The file backend requires a name")
+            signature = fingerprint(size, limit, period_ns, algorithm, burst, windows_ns, adaptive)
+            self._storage = FileStorage(state_file_path(name), size, signature)
+        elif not multiprocessing_mode:
+            self._storage = LocalStorage(size)
+        elif backend == "manager":
+            self._storage = ManagerStorage(size, mp_context)
         else:
-            self._lock = threading.Lock()
-            self._timestamps: List[datetime] = []
-            if self._logger:
-                self._logger.info(f"Multithreading RateLimiter initialized with {limit} requests per {time_period} seconds")
+            self._storage = SharedMemoryStorage(size, mp_context)
+
+        if self._logger:
+            mode = "Multiprocessing" if multiprocessing_mode else "Multithreading"
+            self._logger.info(f"{mode} RateLimiter initialized with {limit} requests per {time_period} seconds")
+
+        self._concurrency = self._storage.semaphore(max_concurrency) if max_concurrency else None
 
-    def acquire(self) -> bool:
+        self._snapshot = None
+        if snapshot_path:
+            if self._remote is not None:
+                raise ValueError("Snapshots are not supported by the remote backend")
+            signature = fingerprint(self._bucket.size, limit, period_ns, algorithm, burst, windows_ns, adaptive)
+            self._restore(snapshot_path, signature)
+            self._snapshot = SnapshotWriter(snapshot_path, self._storage, self._bucket.size, signature, self._clock, snapshot_interval)
+
+    def acquire(self, cost: int = 1, timeout: Optional[float] = None, priority: int = 0) -> bool:
         """
-        Wait until a request can be made without exceeding the rate limit
+        Wait until a request can be made without exceeding the rate limit, nor the concurrency limit if set
+
+        Args:
+            cost: Number of permits the request consumes, all reserved at once
+            timeout: Maximum time to wait in seconds. Since the rate limit wait is known upfront, a request that
+                would wait longer returns False right away without consuming any permit. With priorities, a waiter
+                may also give up after queueing behind more urgent ones
+            priority: Priority class, 0 being the most urgent, when the limiter was created with priorities
 
         Returns:
-            True when the request can proceed
-        """
-        with self._lock:
-            now = datetime.now()
-
-            if isinstance(self._timestamps, list):
-                # Regular list for threading mode
-                self._timestamps = [ts for ts in self._timestamps if now - ts < timedelta(seconds=self._time_period)]
-            else:
-                # Manager list for multiprocessing mode
-                expired_indices = []
-                for i, ts in enumerate(self._timestamps):
-                    if now - ts >= timedelta(seconds=self._time_period):
-                        expired_indices.append(i)
-
-                # Remove expired timestamps (in reverse order to not affect indices)
-                for i in sorted(expired_indices, reverse=True):
-                    self._timestamps.pop(i)
-
-            # If we've reached the limit, wait
-            if len(self._timestamps) >= self._limit:
-                if len(self._timestamps) > 0:  # Check if list is not empty
-                    oldest = self._timestamps[0]
-                    wait_time = (oldest + timedelta(seconds=self._time_period) - now).total_seconds()
-                    if wait_time > 0:
-                        if self._logger:
-                            self._logger.debug(f"RateLimiter triggered for {wait_time:.2f} seconds")
-                        time.sleep(wait_time)
-
-            self._timestamps.append(now)
+            True when the request can proceed, False if it would have to wait longer than timeout
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst), or priority is invalid
+        """
+        self._check(cost, priority)
+        started = self._clock.monotonic_ns()
+
+        # Take the concurrency slot first, so reserved permits are not left idle behind a full pool of requests
+        contended = False
+        if self._concurrency is not None and not self._concurrency.acquire(False):
+            contended = True
+            if not self._concurrency.acquire(True, timeout):
+                return False
+
+        max_wait = None if timeout is None else max(0, int(timeout * 1_000_000_000) - (self._clock.monotonic_ns() - started))
+        if self._lanes is not None:
+            queued_at = self._clock.monotonic_ns()
+            queued = self._lanes.acquire(cost, priority, max_wait, self._reserve, self._refund)
+            if queued is None:
+                self.release()
+                return False
+            if contended or queued > 0:
+                self._record_queued(queued_at + queued - started)
             return True
 
+        now, granted_at = self._reserve(cost, max_wait)
+        if max_wait is not None and granted_at - now > max_wait:
+            self.release()
+            return False
+
+        if contended or granted_at > now:
+            self._record_queued(granted_at - started)
+
+        wait_time = (granted_at - now) / 1e9
+        if wait_time > 0:
+            if self._logger:
+                self._logger.debug(f"RateLimiter triggered for {wait_time:.2f} seconds")
+            self._clock.sleep(wait_time)
+        return True
+
+    def try_acquire(self, cost: int = 1, priority: int = 0) -> bool:
+        """
+        Take permits, and a concurrency slot if set, only if they are available right now, never waiting
+
+        Args:
+            cost: Number of permits the request consumes
+            priority: Priority class, 0 being the most urgent, when the limiter was created with priorities.
+                Fails while waiters of this process are queued, whatever their priority
+
+        Returns:
+            True when the request can proceed, False otherwise
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst), or priority is invalid
+        """
+        self._check(cost, priority)
+        if self._concurrency is not None and not self._concurrency.acquire(False):
+            return False
+
+        if self._lanes is not None:
+            acquired = self._lanes.try_acquire(cost, priority, self._reserve)
+        else:
+            now, granted_at = self._reserve(cost, 0)
+            acquired = granted_at <= now
+        if not acquired:
+            self.release()
+        return acquired
+
+    def _check(self, cost: int, priority: int) -> None:
+        """
+        Validate the permits and priority class of a request
+
+        Args:
+            cost: Number of permits
+            priority: Priority class
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst) minus the reserved capacity for lower classes,
+                or priority is invalid
+        """
+        if self._lanes is not None:
+            self._lanes.check(priority)
+        elif priority != 0:
+            raise ValueError("RateLimiter priority requires priorities")
+        check_cost(self._bucket, cost + (self._headroom if priority else 0))
+
+    def release(self) -> None:
+        """
+        Give back the concurrency slot taken by a successful acquire, a no-op without max_concurrency
+        """
+        if self._concurrency is not None:
+            self._concurrency.release()
+
+    def statistics(self) -> Dict[str, float]:
+        """
+        Report how long callers queued, across every thread or process sharing the limiter
+
+        Returns:
+            Dictionary with the number of acquires that had to wait, and the total and longest time they queued in seconds
+        """
+        slots = self._storage.slots
+        with self._storage.lock:
+            waits = slots[self._statistics + self._WAITS]
+            queued_total = slots[self._statistics + self._QUEUED_TOTAL]
+            queued_max = slots[self._statistics + self._QUEUED_MAX]
+
+        return {
+            "waits": waits,
+            "queued_seconds_total": queued_total / 1e9,
+            "queued_seconds_max": queued_max / 1e9
+        }
+
+    def _record_queued(self, queued: int) -> None:
+        """
+        Account a wait in the statistics
+
+        Args:
+            queued: Time the caller queued in nanoseconds
+        """
+        slots = self._storage.slots
+        with self._storage.lock:
+            slots[self._statistics + self._WAITS] += 1
+            slots[self._statistics + self._QUEUED_TOTAL] += queued
+            if queued > slots[self._statistics + self._QUEUED_MAX]:
+                slots[self._statistics + self._QUEUED_MAX] = queued
+
+    def reserve(self, cost: int = 1) -> "Reservation":
+        """
+        Reserve permits without waiting for them, so the caller can schedule work for when they are due
+        Concurrency slots are not involved, so reservations never need a release()
+
+        Args:
+            cost: Number of permits the request consumes
+
+        Returns:
+            Reservation holding the time at which the request may proceed
+
+        Raises:
+            ValueError: If cost is below 1 or above the limit (or burst)
+        """
+        check_cost(self._bucket, cost)
+        _, granted_at = self._reserve(cost)
+        return Reservation(granted_at, cost, self._clock)
+
+    def feedback(self, response) -> None:
+        """
+        Adapt the rate to an HTTP response from the rate limited upstream
+
+        Args:
+            response: HTTP response object (from requests library)
+
+        Raises:
+            RuntimeError: If the limiter was not created with adaptive=True
+        """
+        if self._adaptive is None:
+            raise RuntimeError("RateLimiter feedback requires adaptive=True")
+
+        info = parse_rate_limit_headers(response)
+        with self._storage.lock:
+            slots = self._storage.slots
+            before = self._adaptive.rate(slots)
+            self._adaptive.feedback(slots, self._clock.monotonic_ns(), **info)
+            after = self._adaptive.rate(slots)
+
+        if self._logger:
+            if after < before:
+                self._logger.info(f"RateLimiter backed off to {after:.2f} requests per {self._time_period} seconds after HTTP {info['status_code']}")
+            elif after > before:
+                self._logger.debug(f"RateLimiter recovered to {after:.2f} requests per {self._time_period} seconds")
+
+    def _reserve(self, cost: int, max_wait: Optional[int] = None, priority: int = 0) -> Tuple[int, int]:
+        """
+        Reserve the next `cost` permits in a single critical section
+
+        Each caller reserves its own permit under the lock and then waits without it until that permit is due,
+        which keeps waiters in FIFO order and lets later callers queue up behind them concurrently
+
+        Args:
+            cost: Number of permits
+            max_wait: Maximum wait in nanoseconds, permits due later than that are not reserved
+            priority: Priority class, all but 0 leaving the reserved capacity available
+
+        Returns:
+            Tuple containing (now, granted_at) in monotonic nanoseconds
+        """
+        headroom = self._headroom if priority else 0
+        if self._remote is not None:
+            return self._remote.reserve(cost, max_wait)
+        if self._lease is not None and cost == 1 and not headroom:
+            return self._reserve_leased(max_wait)
+
+        slots = self._storage.slots
+        with self._storage.lock:
+            now = self._clock.monotonic_ns()
+            granted_at = self._bucket.earliest(slots, now, cost + headroom)
+            if max_wait is None or granted_at - now <= max_wait:
+                self._bucket.commit(slots, granted_at, cost)
+
+        return now, granted_at
+
+    def _refund(self, granted_at: int, cost: int) -> None:
+        """
+        Give back permits reserved but not used, which the remote backend lets lapse
+
+        Args:
+            granted_at: Time the permits were reserved for in monotonic nanoseconds
+            cost: Number of permits
+        """
+        if self._remote is not None:
+            return
+        with self._storage.lock:
+            self._bucket.refund(self._storage.slots, granted_at, cost)
+
+    def _reserve_leased(self, max_wait: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Reserve a single permit from the lease of this process, refilling it from the shared state when it is empty
+
+        Args:
+            max_wait: Maximum wait in nanoseconds, a permit due later than that is not reserved
+
+        Returns:
+            Tuple containing (now, granted_at) in monotonic nanoseconds
+        """
+        lease = self._lease
+        with lease.lock:
+            now = self._clock.monotonic_ns()
+            if lease.take(now):
+                return now, now
+
+            slots = self._storage.slots
+            with self._storage.lock:
+                now = self._clock.monotonic_ns()
+                left_at, left = lease.drain()
+                if left:
+                    self._bucket.refund(slots, left_at, left)
+                granted, granted_at = lease_permits(self._bucket, slots, now, lease.size, max_wait)
+
+            if granted and granted_at <= now and lease.fill(granted_at, granted - 1):
+                multiprocessing.util.Finalize(self, _return_lease, args=(lease, self._storage, self._bucket), exitpriority=10)
+
+        return now, granted_at
+
+    def _restore(self, path: str, signature: int) -> None:
+        """
+        Load the state saved in a snapshot, unless the shared state is already in use
+
+        Args:
+            path: Snapshot file path
+            signature: Fingerprint of the slot layout
+        """
+        state = load_snapshot(path, self._bucket, signature, self._clock)
+        if state is None:
+            return
+        with self._storage.lock:
+            if any(self._storage.slots[:self._bucket.size]):
+                return
+            self._storage.slots[:self._bucket.size] = state
+        if self._logger:
+            self._logger.info(f"RateLimiter state restored from {path}")
+
+    def handle(self) -> "RateLimiterHandle":
+        """
+        Get a lightweight handle to this limiter, to pass to multiprocessing.Pool or ProcessPoolExecutor tasks
+        It pickles to the name or address of the shared state, which each worker reattaches to only once
+
+        Returns:
+            Handle of this limiter
+
+        Raises:
+            ValueError: If the state cannot be reattached by name: only limiters with the "file", "manager" or
+                "remote" backend (without max_concurrency) can be, since the locks of the "shared_memory"
+                backend can only be inherited, e.g. by passing the limiter itself to Process or a Pool initializer
+        """
+        if self._handle is None:
+            if self._backend not in ("file", "manager", "remote"):
+                raise ValueError("Handles require the file, manager or remote backend")
+            if self._remote is not None and self._concurrency is not None:
+                raise ValueError("Handles of the remote backend do not support max_concurrency")
+            self._handle = RateLimiterHandle(uuid.uuid4().hex, pickle.dumps((type(self), self._handle_state())), self)
+        return self._handle
+
+    def _handle_state(self) -> dict:
+        """
+        Attributes a worker needs to reattach to the shared state
+
+        Returns:
+            Attributes of the limiter, without those bound to this process
+        """
+        state = dict(self.__dict__, _logger=None, _snapshot=None, _handle=None)
+        if self._remote is not None:
+            # Only statistics are kept locally, and they stay local to each worker
+            state["_storage"] = None
+        return state
+
+    def _reattach(self, state: dict) -> None:
+        """
+        Restore the attributes taken by _handle_state in a worker
+
+        Args:
+            state: Attributes of the limiter
+        """
+        self.__dict__.update(state)
+        if self._storage is None:
+            self._storage = LocalStorage(self._STATISTICS_SIZE)
+
     def __enter__(self):
         """Context manager support"""
         self.acquire()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - no explicit release needed"""
-        pass
\ No newline at end of file
+        """Context manager exit - releases the concurrency slot, if any"""
+        self.release()
+
+    def close(self) -> None:
+        """Release the limiter state, giving back the permits leased by this process and saving the snapshot if set"""
+        if self._handle is not None:
+            RateLimiterHandle._attached.pop((os.getpid(), self._handle._key), None)
+        if self._lease is not None:
+            _return_lease(self._lease, self._storage, self._bucket)
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._storage.close()
+
+
+class Reservation:
+    """
+    Permits reserved ahead of time, which may be used once their monotonic due time is reached
+    """
+    __slots__ = ("cost", "_granted_at", "_clock")
+
+    def __init__(self, granted_at: int, cost: int, clock=SYSTEM_CLOCK):
+        """
+        Args:
+            granted_at: Due time in monotonic nanoseconds
+            cost: Number of permits reserved
+            clock: Clock the due time refers to
+        """
+        self.cost = cost
+        self._granted_at = granted_at
+        self._clock = clock
+
+    @property
+    def time(self) -> float:
+        """Due time in seconds, comparable with the monotonic time of the limiter clock"""
+        return self._granted_at / 1e9
+
+    @property
+    def delay(self) -> float:
+        """Seconds left until the reservation is due, 0 once it is"""
+        return max(0, self._granted_at - self._clock.monotonic_ns()) / 1e9
+
+    def ready(self) -> bool:
+        """Whether the reservation is due"""
+        return self._granted_at <= self._clock.monotonic_ns()
+
+    def wait(self) -> None:
+        """Block until the reservation is due"""
+        delay = self.delay
+        if delay > 0:
+            self._clock.sleep(delay)
+
+    def __lt__(self, other: "Reservation") -> bool:
+        return self._granted_at < other._granted_at
+
+
+class RateLimiterHandle:
+    """
+    Picklable reference to a RateLimiter, standing in for it in tasks of process pools
+    Unpickling it in a worker reattaches to the shared state the first time only and reuses that limiter afterwards,
+    so passing it with every task costs a dictionary lookup. Any other attribute is looked up on the limiter
+    Limiters stay registered for reuse until closed, which drops them from the registry of their process
+    """
+    _attached: Dict[Tuple[int, str], RateLimiter] = {}
+
+    def __init__(self, key: str, payload: bytes, limiter: RateLimiter):
+        """
+        Args:
+            key: Identifier of the limiter, shared by every handle of it
+            payload: Pickled limiter class and state to reattach with
+            limiter: Limiter of this process
+        """
+        self._key = key
+        self._payload = payload
+        self._attached[(os.getpid(), key)] = limiter
+        self.limiter = limiter
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.limiter, name)
+
+    def __enter__(self):
+        """Context manager support"""
+        self.limiter.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit - releases the concurrency slot, if any"""
+        self.limiter.release()
+
+    def __reduce__(self):
+        return _attach_handle, (self._key, self._payload)
+
+
+def _attach_handle(key: str, payload: bytes) -> RateLimiterHandle:
+    """
+    Rebuild a handle, reattaching to the shared state if this process has not done so yet
+
+    Args:
+        key: Identifier of the limiter
+        payload: Pickled limiter class and state
+
+    Returns:
+        Handle of the limiter in this process
+    """
+    limiter = RateLimiterHandle._attached.get((os.getpid(), key))
+    if limiter is None:
+        cls, state = pickle.loads(payload)
+        limiter = cls.__new__(cls)
+        limiter._reattach(state)
+    handle = RateLimiterHandle.__new__(RateLimiterHandle)
+    handle._key = key
+    handle._payload = payload
+    handle.limiter = limiter
+    if limiter._handle is None:
+        limiter._handle = handle
+    RateLimiterHandle._attached[(os.getpid(), key)] = limiter
+    return handle
+
+
+def _return_lease(lease: PermitLease, storage, bucket: Bucket) -> None:
+    """
+    Give the permits left in a lease back to the shared state
+
+    Args:
+        lease: Lease of this process
+        storage: Shared state storage
+        bucket: Algorithm of the shared state
+    """
+    with lease.lock:
+        left_at, left = lease.drain()
+        if not left:
+            return
+        try:
+            with storage.lock:
+                bucket.refund(storage.slots, left_at, left)
+        except ValueError:
+            # The storage may already be released when the interpreter exits, the permits then simply lapse
+            pass
\ No newline at end of file
@@ -0,0 +1,353 @@
+import os, sys, time, asyncio, threading, traceback
+from typing import Callable, Dict, List, Optional
+
+from .logger import Logger
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel holding any number of pending callbacks, fired from a single thread or an event loop
+    Timers sit in `levels` rings of `slots` buckets, each level `slots` times coarser than the one below, so scheduling
+    and cancelling cost O(1). Whenever a finer ring wraps around, the next bucket of the coarser one is spread over it
+    Timers fire within one tick after they are due, never before, and the driver only wakes up for ticks holding timers
+    """
+    _shared: Dict[int, "TimerWheel"] = {}
+    _attached: Dict[asyncio.AbstractEventLoop, "TimerWheel"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, resolution: float = 0.001, slots: int = 256, levels: int = 4, logger: Optional[Logger] = None):
+        """
+        Initialize timer wheel, which does nothing until driven by start() or attach()
+
+        Args:
+            resolution: Tick length in seconds
+            slots: Number of buckets per level
+            levels: Number of levels. Timers further away than slots ** levels ticks wait in an overflow bucket
+            logger: Optional logger instance for reporting callbacks that raised
+        """
+        self._tick_ns = int(resolution * 1_000_000_000)
+        self._slots = slots
+        self._levels = levels
+        self._logger = logger
+        # Ticks covered by a bucket of each level, plus the span of the whole wheel
+        self._spans = [slots ** level for level in range(levels + 1)]
+        self._wheels: List[List[Dict["Timer", None]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._overflow: Dict["Timer", None] = {}
+        self._counts = [0] * (levels + 1)
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        # Every tick before this one has been processed
+        self._tick = time.monotonic_ns() // self._tick_ns
+        # Tick the driver is due to wake up at, None when it waits for a new timer
+        self._wake_tick: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._stopped = False
+
+    @classmethod
+    def shared(cls) -> "TimerWheel":
+        """
+        Get the timer wheel of this process, started on a daemon thread when first needed
+        Forked children start their own, since the thread of their parent did not survive the fork
+
+        Returns:
+            Running timer wheel
+        """
+        pid = os.getpid()
+        with cls._shared_lock:
+            wheel = cls._shared.get(pid)
+            if wheel is None:
+                wheel = cls._shared[pid] = cls()
+                wheel.start()
+            return wheel
+
+    @classmethod
+    def running(cls) -> "TimerWheel":
+        """
+        Get the timer wheel attached to the running event loop, attached when first needed
+        The wheels of closed loops are dropped whenever a new one is attached
+
+        Returns:
+            Timer wheel firing its callbacks in the running loop
+        """
+        loop = asyncio.get_running_loop()
+        with cls._shared_lock:
+            wheel = cls._attached.get(loop)
+            if wheel is None:
+                for closed in [attached for attached in cls._attached if attached.is_closed()]:
+                    del cls._attached[closed]
+                wheel = cls._attached[loop] = cls()
+                wheel.attach(loop)
+            return wheel
+
+    async def sleep(self, delay: float) -> None:
+        """
+        Suspend the calling coroutine for a delay, with the wheel attached to its event loop
+
+        Args:
+            delay: Delay in seconds
+        """
+        future = self._loop.create_future()
+        timer = self.call_later(delay, _resolve, future)
+        try:
+            await future
+        finally:
+            timer.cancel()
+
+    def call_at(self, when: float, callback: Callable, *args) -> "Timer":
+        """
+        Schedule a callback at a monotonic time
+
+        Args:
+            when: Due time in seconds, comparable with time.monotonic()
+            callback: Callable to run
+            args: Positional arguments of callback
+
+        Returns:
+            Timer handle, which can be cancelled
+        """
+        timer = Timer(self, callback, args)
+        tick = -(-int(when * 1_000_000_000) // self._tick_ns)
+        with self._lock:
+            self._insert(timer, max(tick, self._tick))
+            if self._wake_tick is None or tick < self._wake_tick:
+                self._wake()
+        return timer
+
+    def call_later(self, delay: float, callback: Callable, *args) -> "Timer":
+        """
+        Schedule a callback after a delay
+
+        Args:
+            delay: Delay in seconds
+            callback: Callable to run
+            args: Positional arguments of callback
+
+        Returns:
+            Timer handle, which can be cancelled
+        """
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def __len__(self) -> int:
+        """Number of pending timers"""
+        return sum(self._counts)
+
+    def _insert(self, timer: "Timer", tick: int) -> None:
+        """
+        Place a timer in the finest level whose ring still reaches its tick, with the lock held
+
+        Args:
+            timer: Timer to place
+            tick: Tick the timer is due at, no earlier than the current one
+        """
+        for level in range(self._levels):
+            span = self._spans[level]
+            if tick // span - self._tick // span < self._slots:
+                bucket = self._wheels[level][tick // span % self._slots]
+                break
+        else:
+            level = self._levels
+            bucket = self._overflow
+        timer._tick = tick
+        timer._level = level
+        timer._bucket = bucket
+        bucket[timer] = None
+        self._counts[level] += 1
+
+    def _remove(self, timer: "Timer") -> None:
+        """
+        Take a timer out of its bucket, with the lock held
+
+        Args:
+            timer: Pending timer
+        """
+        del timer._bucket[timer]
+        timer._bucket = None
+        self._counts[timer._level] -= 1
+
+    def _advance(self, now: int) -> List["Timer"]:
+        """
+        Process every tick up to the current one, with the lock held
+
+        Args:
+            now: Current monotonic time in nanoseconds
+
+        Returns:
+            Timers that are due, in the order of their ticks
+        """
+        due = []
+        target = now // self._tick_ns
+        while self._tick <= target:
+            tick = self._tick
+            # Spread the coarser buckets starting at this tick over the finer levels, coarsest first
+            for level in range(self._levels, 0, -1):
+                if tick % self._spans[level] == 0 and self._counts[level]:
+                    bucket = self._overflow if level == self._levels else self._wheels[level][tick // self._spans[level] % self._slots]
+                    for timer in list(bucket):
+                        self._remove(timer)
+                        self._insert(timer, timer._tick)
+
+            bucket = self._wheels[0][tick % self._slots]
+            for timer in list(bucket):
+                self._remove(timer)
+                due.append(timer)
+
+            # Skip straight to the next cascade when the finer levels are empty
+            self._tick = tick + 1
+            for level in range(self._levels):
+                if self._counts[level]:
+                    break
+                span = self._spans[level + 1]
+                self._tick = max(self._tick, min(target + 1, -(-self._tick // span) * span))
+            else:
+                if not self._counts[self._levels]:
+                    self._tick = max(self._tick, target + 1)
+        return due
+
+    def _next_tick(self) -> Optional[int]:
+        """
+        Next tick the driver has to process, with the lock held
+
+        Returns:
+            Tick holding timers or a cascade, None when there is no timer at all
+        """
+        if self._counts[0]:
+            # Due timers of the finest level sit in the rest of its current ring
+            ring_end = (self._tick // self._slots + 1) * self._slots
+            for tick in range(self._tick, ring_end):
+                if self._wheels[0][tick % self._slots]:
+                    return tick
+            return ring_end
+        for level in range(1, self._levels + 1):
+            if self._counts[level]:
+                span = self._spans[level]
+                return -(-self._tick // span) * span
+        return None
+
+    def _fire(self, due: List["Timer"]) -> None:
+        """
+        Run due callbacks, without the lock
+
+        Args:
+            due: Timers to fire
+        """
+        for timer in due:
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                if self._logger:
+                    self._logger.error(f"TimerWheel callback {timer.callback!r} raised {e!r}")
+                else:
+                    traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
+
+    def _wake(self) -> None:
+        """Make the driver recompute its next wake-up after an earlier timer was scheduled, with the lock held"""
+        if self._thread is not None:
+            self._condition.notify()
+        elif self._loop is not None:
+            self._loop.call_soon_threadsafe(self._run_loop)
+
+    def start(self) -> None:
+        """Drive the wheel from a daemon thread"""
+        with self._lock:
+            if self._thread is None and self._loop is None:
+                self._thread = threading.Thread(target=self._run_thread, name="kronos-timer-wheel", daemon=True)
+                self._thread.start()
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Drive the wheel from an event loop, firing callbacks in it with a single loop timer
+
+        Args:
+            loop: Event loop whose time() is time.monotonic(), as with the default loops
+        """
+        with self._lock:
+            if self._thread is None and self._loop is None:
+                self._loop = loop
+                loop.call_soon_threadsafe(self._run_loop)
+
+    def stop(self) -> None:
+        """Stop the driver, leaving the pending timers unfired"""
+        with self._lock:
+            self._stopped = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if self._loop is not None and self._handle is not None:
+            self._loop.call_soon_threadsafe(self._handle.cancel)
+
+    def _run_thread(self) -> None:
+        """Fire timers as they become due until stopped"""
+        while True:
+            with self._lock:
+                while True:
+                    if self._stopped:
+                        return
+                    now = time.monotonic_ns()
+                    due = self._advance(now)
+                    if due:
+                        break
+                    self._wake_tick = self._next_tick()
+                    self._condition.wait(None if self._wake_tick is None else max(0, self._wake_tick * self._tick_ns - now) / 1e9)
+            self._fire(due)
+
+    def _run_loop(self) -> None:
+        """Fire the due timers, then arm the loop timer for the next tick to process"""
+        with self._lock:
+            if self._stopped:
+                return
+            due = self._advance(time.monotonic_ns())
+            wake_tick = self._next_tick()
+            # Only the earliest wake-up is kept armed
+            if self._handle is not None:
+                self._handle.cancel()
+            self._handle = None if wake_tick is None else self._loop.call_at(wake_tick * self._tick_ns / 1e9, self._run_loop)
+            self._wake_tick = wake_tick
+        self._fire(due)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    """
+    Wake the coroutine sleeping on a future, unless it was cancelled meanwhile
+
+    Args:
+        future: Future awaited by TimerWheel.sleep
+    """
+    if not future.done():
+        future.set_result(None)
+
+
+class Timer:
+    """
+    Callback pending in a TimerWheel
+    """
+    __slots__ = ("callback", "args", "_wheel", "_tick", "_level", "_bucket")
+
+    def __init__(self, wheel: TimerWheel, callback: Callable, args: tuple):
+        self.callback = callback
+        self.args = args
+        self._wheel = wheel
+        self._tick = 0
+        self._level = 0
+        self._bucket = None
+
+    def cancel(self) -> bool:
+        """
+        Remove the timer from its wheel
+
+        Returns:
+            True if it was still pending
+        """
+        with self._wheel._lock:
+            if self._bucket is None:
+                return False
+            self._wheel._remove(self)
+            return True
+
+    @property
+    def when(self) -> float:
+        """Due time in seconds, rounded up to the wheel resolution"""
+        return self._tick * self._wheel._tick_ns / 1e9
\ No newline at end of file
@@ -0,0 +1,705 @@
+"""
+Kronos utilities for rate limiting algorithms over fixed-size slot arrays
+All-zero slots always represent a fresh state
+"""
+
+from typing import List, MutableSequence, Optional, Sequence, Tuple
+
+
+class Bucket:
+    """
+    Rate limiting algorithm whose state occupies `size` slots starting at `offset`
+    Callers hold the storage lock around earliest and commit, so both see the same state
+    """
+    size = 0
+    capacity = 0
+
+    def earliest(self, slots: MutableSequence[int], now: int, cost: int = 1) -> int:
+        """
+        Earliest time at which the next `cost` permits can be granted together
+
+        Args:
+            slots: State slots
+            now: Current monotonic time in nanoseconds
+            cost: Number of permits, at most capacity
+
+        Returns:
+            Monotonic time in nanoseconds, never before now
+        """
+        raise NotImplementedError
+
+    def commit(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Record permits granted at the given time
+
+        Args:
+            slots: State slots
+            granted_at: Grant time, no earlier than what earliest returned
+            cost: Number of permits
+        """
+        raise NotImplementedError
+
+    def refund(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Give back unused permits committed at the given time, as far as the algorithm can tell them apart
+
+        Args:
+            slots: State slots
+            granted_at: Time the permits were committed at
+            cost: Number of permits
+        """
+        raise NotImplementedError
+
+    def expires_at(self, slots: MutableSequence[int]) -> int:
+        """
+        Time from which the state constrains nothing anymore and is equivalent to a fresh one
+
+        Args:
+            slots: State slots
+
+        Returns:
+            Monotonic time in nanoseconds
+        """
+        raise NotImplementedError
+
+    def shift(self, slots: MutableSequence[int], delta: int) -> None:
+        """
+        Move every time held in the state, e.g. onto the monotonic clock of another boot
+
+        Args:
+            slots: State slots
+            delta: Nanoseconds added to every time
+        """
+        raise NotImplementedError
+
+
+class SlidingWindowLog(Bucket):
+    """
+    Sliding window log keeping the grant time of each of the last `limit` permits in a ring
+    Exact, at the cost of one slot per permit
+    """
+    def __init__(self, limit: int, period_ns: int, offset: int = 0):
+        """
+        Args:
+            limit: Maximum number of permits in any window
+            period_ns: Window length in nanoseconds
+            offset: Index of the first state slot
+        """
+        self._limit = limit
+        self._period_ns = period_ns
+        # Slot layout: ring head, ring count, then one timestamp per permit
+        self._HEAD = offset
+        self._COUNT = offset + 1
+        self._RING = offset + 2
+        self.size = 2 + limit
+        self.capacity = limit
+
+    def earliest(self, slots: MutableSequence[int], now: int, cost: int = 1) -> int:
+        """
+        Earliest time at which the next `cost` permits can be granted together
+
+        Args:
+            slots: State slots
+            now: Current monotonic time in nanoseconds
+            cost: Number of permits, at most capacity
+
+        Returns:
+            Monotonic time in nanoseconds, never before now
+        """
+        if slots[self._COUNT] + cost <= self._limit:
+            return now
+        # The oldest `count + cost - limit` permits have to leave the window first, the last of them sits `cost - 1` after the head
+        return max(now, slots[self._RING + (slots[self._HEAD] + cost - 1) % self._limit] + self._period_ns)
+
+    def commit(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Record permits granted at the given time
+
+        Args:
+            slots: State slots
+            granted_at: Grant time as returned by earliest
+            cost: Number of permits
+        """
+        head = slots[self._HEAD]
+        slots[self._COUNT] = min(self._limit, slots[self._COUNT] + cost)
+        for i in range(cost):
+            slots[self._RING + (head + i) % self._limit] = granted_at
+        slots[self._HEAD] = (head + cost) % self._limit
+
+    def refund(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Give back unused permits committed at the given time
+
+        Only permits that are still the newest in the log are removed, so the log stays ordered.
+        Permits committed after them by someone else are left alone and simply lapse
+
+        Args:
+            slots: State slots
+            granted_at: Time the permits were committed at
+            cost: Number of permits
+        """
+        head = slots[self._HEAD]
+        count = slots[self._COUNT]
+        for _ in range(cost):
+            if count == 0 or slots[self._RING + (head - 1) % self._limit] != granted_at:
+                break
+            head = (head - 1) % self._limit
+            count -= 1
+        slots[self._HEAD] = head
+        slots[self._COUNT] = count
+
+    def expires_at(self, slots: MutableSequence[int]) -> int:
+        """
+        Time from which the state constrains nothing anymore and is equivalent to a fresh one
+
+        Args:
+            slots: State slots
+
+        Returns:
+            Monotonic time in nanoseconds
+        """
+        if slots[self._COUNT] == 0:
+            return 0
+        # The newest permit sits just behind the head
+        return slots[self._RING + (slots[self._HEAD] - 1) % self._limit] + self._period_ns
+
+    def shift(self, slots: MutableSequence[int], delta: int) -> None:
+        """
+        Move the grant times of the permits in the log
+
+        Args:
+            slots: State slots
+            delta: Nanoseconds added to every time
+        """
+        head = slots[self._HEAD]
+        for i in range(slots[self._COUNT]):
+            slots[self._RING + (head - 1 - i) % self._limit] += delta
+
+
+class SlidingWindowCounter(Bucket):
+    """
+    Sliding window approximated from the counts of the current and previous fixed windows, in three slots
+    The previous count is weighted by how much of the previous window the sliding window still overlaps, which assumes
+    its requests were evenly spread. Exact when they are; at worst 2 * limit requests get into a window when the previous
+    ones were all bunched at its end, and throttling starts early when they were bunched at its start
+    """
+    def __init__(self, limit: int, period_ns: int, offset: int = 0):
+        """
+        Args:
+            limit: Maximum number of permits in any window, as estimated
+            period_ns: Window length in nanoseconds
+            offset: Index of the first state slot
+        """
+        self._limit = limit
+        self._period_ns = period_ns
+        # Slot layout: index of the current fixed window, its count, count of the window before it
+        self._WINDOW = offset
+        self._CURRENT = offset + 1
+        self._PREVIOUS = offset + 2
+        self.size = 3
+        self.capacity = limit
+
+    def _counts(self, slots: MutableSequence[int], window: int) -> Tuple[int, int]:
+        """
+        Counts of a fixed window and the one before it, according to the state
+
+        Args:
+            slots: State slots
+            window: Index of the fixed window, no earlier than the one in the state
+
+        Returns:
+            Tuple containing (current count, previous count)
+        """
+        if window == slots[self._WINDOW]:
+            return slots[self._CURRENT], slots[self._PREVIOUS]
+        if window == slots[self._WINDOW] + 1:
+            return 0, slots[self._CURRENT]
+        return 0, 0
+
+    def earliest(self, slots: MutableSequence[int], now: int, cost: int = 1) -> int:
+        """
+        Earliest time at which the next `cost` permits can be granted together
+
+        Args:
+            slots: State slots
+            now: Current monotonic time in nanoseconds
+            cost: Number of permits, at most capacity
+
+        Returns:
+            Monotonic time in nanoseconds, never before now
+        """
+        # Permits reserved ahead may already have moved the state into a later window
+        window = max(now // self._period_ns, slots[self._WINDOW])
+        current, previous = self._counts(slots, window)
+        if current + cost > self._limit:
+            # Only the next window can fit them, once enough of this one has slid out
+            window += 1
+            current, previous = 0, current
+
+        start = window * self._period_ns
+        # Fraction of the previous window that must have slid out: previous * (1 - elapsed) + current + cost <= limit
+        excess = previous - (self._limit - current - cost)
+        if excess <= 0:
+            return max(now, start)
+        return max(now, start + -(-self._period_ns * excess // previous))
+
+    def commit(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Record permits granted at the given time
+
+        Args:
+            slots: State slots
+            granted_at: Grant time as returned by earliest
+            cost: Number of permits
+        """
+        window = max(granted_at // self._period_ns, slots[self._WINDOW])
+        current, previous = self._counts(slots, window)
+        slots[self._WINDOW] = window
+        slots[self._CURRENT] = current + cost
+        slots[self._PREVIOUS] = previous
+
+    def refund(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Give back unused permits, as long as their fixed window is still counted
+
+        Args:
+            slots: State slots
+            granted_at: Time the permits were committed at
+            cost: Number of permits
+        """
+        window = granted_at // self._period_ns
+        if window == slots[self._WINDOW]:
+            slots[self._CURRENT] = max(0, slots[self._CURRENT] - cost)
+        elif window == slots[self._WINDOW] - 1:
+            slots[self._PREVIOUS] = max(0, slots[self._PREVIOUS] - cost)
+
+    def expires_at(self, slots: MutableSequence[int]) -> int:
+        """
+        Time from which the state constrains nothing anymore and is equivalent to a fresh one
+
+        Args:
+            slots: State slots
+
+        Returns:
+            Monotonic time in nanoseconds
+        """
+        if slots[self._CURRENT] == 0 and slots[self._PREVIOUS] == 0:
+            return 0
+        # The current window stops weighing anything once the next one has fully elapsed
+        return (slots[self._WINDOW] + 2) * self._period_ns
+
+    def shift(self, slots: MutableSequence[int], delta: int) -> None:
+        """
+        Move the fixed windows, rounding up to the next window boundary so the counts never expire early
+
+        Args:
+            slots: State slots
+            delta: Nanoseconds added to every time
+        """
+        if slots[self._CURRENT] or slots[self._PREVIOUS]:
+            slots[self._WINDOW] = -(-(slots[self._WINDOW] * self._period_ns + delta) // self._period_ns)
+
+
+class TokenBucket(Bucket):
+    """
+    Token bucket implemented as GCRA (generic cell rate algorithm)
+    Keeps a single theoretical arrival time, refills one token every `period / limit` and holds at most `burst` tokens
+    """
+    def __init__(self, limit: int, period_ns: int, burst: int, offset: int = 0):
+        """
+        Args:
+            limit: Number of tokens refilled per period
+            period_ns: Refill period in nanoseconds
+            burst: Bucket capacity, i.e. how many permits can be granted back to back
+            offset: Index of the state slot
+        """
+        # Rounded up so the refill rate never exceeds the configured limit
+        self._interval_ns = -(-period_ns // limit)
+        self._burst = burst
+        # Slot layout: theoretical arrival time
+        self._TAT = offset
+        self.size = 1
+        self.capacity = burst
+
+    def earliest(self, slots: MutableSequence[int], now: int, cost: int = 1) -> int:
+        """
+        Earliest time at which the next `cost` permits can be granted together
+
+        Args:
+            slots: State slots
+            now: Current monotonic time in nanoseconds
+            cost: Number of permits, at most capacity
+
+        Returns:
+            Monotonic time in nanoseconds, never before now
+        """
+        return max(now, slots[self._TAT] + (cost - self._burst) * self._interval_ns)
+
+    def commit(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Record permits granted at the given time
+
+        Args:
+            slots: State slots
+            granted_at: Grant time as returned by earliest
+            cost: Number of permits
+        """
+        slots[self._TAT] = max(slots[self._TAT], granted_at) + cost * self._interval_ns
+
+    def refund(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Give back unused permits, which only moves the theoretical arrival time back
+
+        Args:
+            slots: State slots
+            granted_at: Time the permits were committed at
+            cost: Number of permits
+        """
+        slots[self._TAT] -= cost * self._interval_ns
+
+    def expires_at(self, slots: MutableSequence[int]) -> int:
+        """
+        Time from which the state constrains nothing anymore and is equivalent to a fresh one
+
+        Args:
+            slots: State slots
+
+        Returns:
+            Monotonic time in nanoseconds
+        """
+        # The bucket is full again once the theoretical arrival time is reached
+        return slots[self._TAT]
+
+    def shift(self, slots: MutableSequence[int], delta: int) -> None:
+        """
+        Move the theoretical arrival time, unless the state is fresh
+
+        Args:
+            slots: State slots
+            delta: Nanoseconds added to every time
+        """
+        if slots[self._TAT]:
+            slots[self._TAT] += delta
+
+
+class AdaptiveBucket(Bucket):
+    """
+    Gate following upstream feedback: a pause deadline plus a GCRA whose emission interval lives in the slots,
+    so every process sharing the state sees the same effective rate
+    The rate backs off multiplicatively and recovers additively (AIMD), never above `limit` nor below one permit per period,
+    while syncing to the upstream quota can slow it down further when few requests remain until a distant reset
+    """
+    def __init__(self, limit: int, period_ns: int, offset: int = 0, decrease: float = 0.5, increase: float = 0.05):
+        """
+        Args:
+            limit: Highest number of permits per period
+            period_ns: Period in nanoseconds, which is also how far ahead permits can be granted in a burst
+            offset: Index of the first state slot
+            decrease: Factor applied to the rate when the upstream signals overload
+            increase: Fraction of limit added back to the rate per period after each successful response
+        """
+        self._limit = limit
+        self._period_ns = period_ns
+        self._base_interval_ns = -(-period_ns // limit)
+        self._decrease = decrease
+        self._increase = increase
+        # Slot layout: theoretical arrival time, emission interval (0 meaning the base one), paused until
+        self._TAT = offset
+        self._INTERVAL = offset + 1
+        self._PAUSED_UNTIL = offset + 2
+        self.size = 3
+        self.capacity = limit
+
+    def earliest(self, slots: MutableSequence[int], now: int, cost: int = 1) -> int:
+        """
+        Earliest time at which the next `cost` permits can be granted together
+
+        Args:
+            slots: State slots
+            now: Current monotonic time in nanoseconds
+            cost: Number of permits, at most capacity
+
+        Returns:
+            Monotonic time in nanoseconds, never before now
+        """
+        interval = slots[self._INTERVAL] or self._base_interval_ns
+        # Intervals longer than the period leave no room for a burst, the permits are due at the arrival time
+        return max(now, slots[self._PAUSED_UNTIL], slots[self._TAT] + min(cost * interval - self._period_ns, 0))
+
+    def commit(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Record permits granted at the given time
+
+        Args:
+            slots: State slots
+            granted_at: Grant time, no earlier than what earliest returned
+            cost: Number of permits
+        """
+        interval = slots[self._INTERVAL] or self._base_interval_ns
+        slots[self._TAT] = max(slots[self._TAT], granted_at) + cost * interval
+
+    def refund(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """
+        Give back unused permits at the base interval, which is never more than they were committed at
+
+        Args:
+            slots: State slots
+            granted_at: Time the permits were committed at
+            cost: Number of permits
+        """
+        slots[self._TAT] -= cost * self._base_interval_ns
+
+    def expires_at(self, slots: MutableSequence[int]) -> int:
+        """
+        Time from which the state constrains nothing anymore and is equivalent to a fresh one
+
+        Args:
+            slots: State slots
+
+        Returns:
+            Monotonic time in nanoseconds
+        """
+        return max(slots[self._TAT], slots[self._PAUSED_UNTIL])
+
+    def shift(self, slots: MutableSequence[int], delta: int) -> None:
+        """
+        Move the theoretical arrival time and the pause deadline, the emission interval being a duration
+
+        Args:
+            slots: State slots
+            delta: Nanoseconds added to every time
+        """
+        for slot in (self._TAT, self._PAUSED_UNTIL):
+            if slots[slot]:
+                slots[slot] += delta
+
+    def rate(self, slots: MutableSequence[int]) -> float:
+        """
+        Current effective rate
+
+        Args:
+            slots: State slots
+
+        Returns:
+            Permits per period
+        """
+        return self._period_ns / (slots[self._INTERVAL] or self._base_interval_ns)
+
+    def back_off(self, slots: MutableSequence[int]) -> None:
+        """
+        Multiplicatively decrease the rate
+
+        Args:
+            slots: State slots
+        """
+        interval = slots[self._INTERVAL] or self._base_interval_ns
+        self._set_interval(slots, interval / self._decrease, max(interval, self._period_ns))
+
+    def recover(self, slots: MutableSequence[int]) -> None:
+        """
+        Additively increase the rate back towards the limit
+
+        Args:
+            slots: State slots
+        """
+        interval = slots[self._INTERVAL]
+        if interval:
+            rate = self._period_ns / interval + self._increase * self._limit
+            self._set_interval(slots, self._period_ns / rate, interval)
+
+    def pause(self, slots: MutableSequence[int], until: int) -> None:
+        """
+        Hold every permit until the given time
+
+        Args:
+            slots: State slots
+            until: Monotonic time in nanoseconds
+        """
+        slots[self._PAUSED_UNTIL] = max(slots[self._PAUSED_UNTIL], until)
+
+    def sync(self, slots: MutableSequence[int], now: int, remaining: int, reset_ns: int) -> None:
+        """
+        Spread the upstream's remaining quota evenly over the time left until it resets
+
+        Args:
+            slots: State slots
+            now: Current monotonic time in nanoseconds
+            remaining: Requests the upstream still accepts in its current window
+            reset_ns: Nanoseconds until the upstream window resets
+        """
+        if remaining <= 0:
+            self.pause(slots, now + reset_ns)
+        else:
+            self._set_interval(slots, reset_ns / remaining, max(reset_ns, self._period_ns))
+
+    def feedback(self, slots: MutableSequence[int], now: int, status_code: Optional[int], retry_after: Optional[float], remaining: Optional[int], reset: Optional[float]) -> None:
+        """
+        Adjust the state to an upstream response
+
+        Args:
+            slots: State slots
+            now: Current monotonic time in nanoseconds
+            status_code: HTTP status code
+            retry_after: Seconds the upstream asked to wait, if any
+            remaining: Requests the upstream still accepts in its current window, if known
+            reset: Seconds until the upstream window resets, if known
+        """
+        if status_code in (429, 503):
+            self.back_off(slots)
+        elif status_code is not None and status_code < 400:
+            self.recover(slots)
+
+        if retry_after is not None:
+            self.pause(slots, now + int(retry_after * 1_000_000_000))
+        if remaining is not None and reset is not None:
+            self.sync(slots, now, remaining, int(reset * 1_000_000_000))
+
+    def _set_interval(self, slots: MutableSequence[int], interval: float, longest: int) -> None:
+        """
+        Store an emission interval clamped between the limit and the given longest one
+
+        Args:
+            slots: State slots
+            interval: Emission interval in nanoseconds
+            longest: Longest emission interval allowed in nanoseconds
+        """
+        interval = min(max(int(interval), self._base_interval_ns), longest)
+        slots[self._INTERVAL] = 0 if interval == self._base_interval_ns else interval
+
+
+class CompositeBucket(Bucket):
+    """
+    Several windows, such as per second, per minute and per day, that must all allow a request
+    Their states sit side by side in one slot array, so a request is checked and committed against all of them at once
+    """
+    def __init__(self, buckets: List[Bucket]):
+        """
+        Args:
+            buckets: Algorithms of each window, built with consecutive offsets
+        """
+        self.buckets = buckets
+        self.size = sum(bucket.size for bucket in buckets)
+        self.capacity = min(bucket.capacity for bucket in buckets)
+
+    def earliest(self, slots: MutableSequence[int], now: int, cost: int = 1) -> int:
+        """Earliest time at which every window can grant the next `cost` permits"""
+        # Once a window allows a request it keeps allowing it later on, so the latest of all windows satisfies every one
+        granted_at = now
+        for bucket in self.buckets:
+            granted_at = bucket.earliest(slots, granted_at, cost)
+        return granted_at
+
+    def commit(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """Record permits granted at the given time in every window"""
+        for bucket in self.buckets:
+            bucket.commit(slots, granted_at, cost)
+
+    def refund(self, slots: MutableSequence[int], granted_at: int, cost: int = 1) -> None:
+        """Give back unused permits committed at the given time in every window"""
+        for bucket in self.buckets:
+            bucket.refund(slots, granted_at, cost)
+
+    def expires_at(self, slots: MutableSequence[int]) -> int:
+        """Time from which no window constrains anything anymore"""
+        return max(bucket.expires_at(slots) for bucket in self.buckets)
+
+    def shift(self, slots: MutableSequence[int], delta: int) -> None:
+        """Move every time held in the state of every window"""
+        for bucket in self.buckets:
+            bucket.shift(slots, delta)
+
+
+def create_bucket(limit: int, period_ns: int, algorithm: str, burst: Optional[int], windows: Optional[Sequence[Tuple[int, float]]] = None, adaptive: bool = False) -> Bucket:
+    """
+    Build the rate limiting algorithm selected by name
+
+    Args:
+        limit: Maximum number of requests allowed in the time period
+        period_ns: Time period in nanoseconds
+        algorithm: Either "sliding_window", "sliding_window_counter", "token_bucket" or "pacing", a token bucket with a burst of 1 by default
+        burst: Token bucket capacity (defaults to limit, or 1 for "pacing")
+        windows: Additional (limit, time period in seconds) windows enforced with the same algorithm, with a burst of their own limit
+        adaptive: Whether to add an AdaptiveBucket over the main limit, always placed last in a CompositeBucket
+
+    Returns:
+        Algorithm instance
+
+    Raises:
+        ValueError: If limit, period_ns, algorithm, burst or a window is invalid
+    """
+    if limit < 1:
+        raise ValueError(f"Invalid limit: {limit}. Limit must be at least 1")
+    if period_ns < 1:
+        raise ValueError(f"Invalid time period: {period_ns / 1e9}. Time period must be positive")
+    if burst is not None and burst < 1:
+        raise ValueError(f"Invalid burst: {burst}. Burst must be at least 1")
+    if algorithm not in ("sliding_window", "sliding_window_counter", "token_bucket", "pacing"):
+        raise ValueError(f"Invalid algorithm: {algorithm}. Valid algorithms are: sliding_window, sliding_window_counter, token_bucket, pacing")
+
+    if burst is None:
+        burst = 1 if algorithm == "pacing" else limit
+    specs = [(limit, period_ns, burst)]
+    for window_limit, window_period in windows or ():
+        if window_limit < 1 or window_period * 1_000_000_000 < 1:
+            raise ValueError(f"Invalid window: ({window_limit}, {window_period}). Limit must be at least 1 and time period positive")
+        specs.append((window_limit, int(window_period * 1_000_000_000), window_limit))
+
+    buckets = []
+    offset = 0
+    for window_limit, window_period_ns, window_burst in specs:
+        if algorithm == "sliding_window":
+            bucket = SlidingWindowLog(window_limit, window_period_ns, offset)
+        elif algorithm == "sliding_window_counter":
+            bucket = SlidingWindowCounter(window_limit, window_period_ns, offset)
+        else:
+            bucket = TokenBucket(window_limit, window_period_ns, window_burst, offset)
+        buckets.append(bucket)
+        offset += bucket.size
+
+    if adaptive:
+        buckets.append(AdaptiveBucket(limit, period_ns, offset))
+
+    return buckets[0] if len(buckets) == 1 else CompositeBucket(buckets)
+
+
+def lease_permits(bucket: Bucket, slots: MutableSequence[int], now: int, count: int, max_wait: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Take up to `count` single permits that are available right away, or when none is, reserve a single one
+
+    Args:
+        bucket: Algorithm the permits are taken from
+        slots: State slots, with the storage lock held
+        now: Current monotonic time in nanoseconds
+        count: Highest number of permits to take
+        max_wait: Maximum wait in nanoseconds, a single permit due later than that is not reserved
+
+    Returns:
+        Tuple containing (number of permits taken, time they are granted at)
+    """
+    granted = 0
+    while granted < count and bucket.earliest(slots, now) <= now:
+        bucket.commit(slots, now)
+        granted += 1
+    if granted:
+        return granted, now
+
+    granted_at = bucket.earliest(slots, now)
+    if max_wait is not None and granted_at - now > max_wait:
+        return 0, granted_at
+    bucket.commit(slots, granted_at)
+    return 1, granted_at
+
+
+def check_cost(bucket: Bucket, cost: int) -> None:
+    """
+    Validate the number of permits requested at once
+
+    Args:
+        bucket: Algorithm the permits are requested from
+        cost: Number of permits
+
+    Raises:
+        ValueError: If cost is below 1 or above what the algorithm can ever grant together
+    """
+    if cost < 1 or cost > bucket.capacity:
+        raise ValueError(f"Invalid cost: {cost}. Cost must be between 1 and {bucket.capacity}")
\ No newline at end of file
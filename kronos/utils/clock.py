@@ -0,0 +1,71 @@
+"""
+Kronos utilities for driving limiters with a simulated clock
+
+A clock is any object providing monotonic_ns(), sleep(seconds) and time(). The system clock binds the time
+module functions directly, so limiters pay nothing for the indirection in production
+"""
+
+import time, threading
+
+
+class SystemClock:
+    """
+    Clock of the system, the default everywhere, which unlike the time module can be pickled along with a limiter
+    """
+    monotonic_ns = staticmethod(time.monotonic_ns)
+    monotonic = staticmethod(time.monotonic)
+    sleep = staticmethod(time.sleep)
+    # Last, as it shadows the module in the class body
+    time = staticmethod(time.time)
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+class SimulatedClock:
+    """
+    Clock whose time only moves when slept on or advanced, so hours of traffic replay in a fraction of a second
+    Meant for a single process, since its time is not shared with any other one. Concurrent sleepers each move the
+    clock forward by their own delay, so simulations are only exact when driven from a single thread
+    """
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        """
+        Args:
+            start: Initial monotonic time in seconds
+            epoch: Wall-clock time in seconds since the epoch matching the initial monotonic time
+        """
+        self._lock = threading.Lock()
+        self._ns = int(start * 1_000_000_000)
+        self._offset = int(epoch * 1_000_000_000) - self._ns
+
+    def monotonic_ns(self) -> int:
+        """Current monotonic time in nanoseconds"""
+        return self._ns
+
+    def monotonic(self) -> float:
+        """Current monotonic time in seconds"""
+        return self._ns / 1e9
+
+    def time(self) -> float:
+        """Current wall-clock time in seconds since the epoch"""
+        return (self._ns + self._offset) / 1e9
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Advance the clock instead of waiting
+
+        Args:
+            seconds: Delay in seconds
+        """
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """
+        Move the clock forward
+
+        Args:
+            seconds: Delay in seconds, ignored when negative
+        """
+        if seconds > 0:
+            with self._lock:
+                self._ns += round(seconds * 1_000_000_000)
\ No newline at end of file
@@ -2,8 +2,10 @@
 Kronos utilities for HTTP
 """
 
+import time
+from email.utils import parsedate_to_datetime
 from requests import Response
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from urllib.parse import urlparse, parse_qsl
 
 
@@ -141,4 +143,74 @@ def extract_cookies(response: Response) -> Dict[str, Any]:
                 'http_only': cookie.has_nonstandard_attr('HttpOnly')
             }
 
-    return cookies
\ No newline at end of file
+    return cookies
+
+
+def parse_rate_limit_headers(response: Response) -> Dict[str, Any]:
+    """
+    Extract rate limiting feedback from an HTTP response
+    Understands Retry-After and both the X-RateLimit-* and RateLimit-* remaining/reset headers
+
+    Args:
+        response: HTTP response object
+
+    Returns:
+        Dictionary with the status code, retry_after, remaining and reset, the latter in seconds from now, each None when absent
+    """
+    headers = response.headers
+
+    remaining = _first_header(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+    try:
+        remaining = int(float(remaining)) if remaining is not None else None
+    except ValueError:
+        remaining = None
+
+    return {
+        "status_code": response.status_code,
+        "retry_after": _parse_delay(headers.get("Retry-After")),
+        "remaining": remaining,
+        "reset": _parse_delay(_first_header(headers, "X-RateLimit-Reset", "RateLimit-Reset"))
+    }
+
+
+def _first_header(headers, *names: str) -> Optional[str]:
+    """
+    Get the first header present among several names
+
+    Args:
+        headers: Case-insensitive response headers
+        names: Header names by preference
+
+    Returns:
+        Header value, or None if none is present
+    """
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _parse_delay(value: Optional[str]) -> Optional[float]:
+    """
+    Convert a header holding either delta seconds, epoch seconds or an HTTP date into seconds from now
+
+    Args:
+        value: Raw header value
+
+    Returns:
+        Non-negative seconds, or None if the value is absent or unparsable
+    """
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+        # Values this large can only be epoch timestamps, as sent by e.g. GitHub's X-RateLimit-Reset
+        if seconds > 1e9:
+            seconds -= time.time()
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, seconds)
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Kronos utilities for leasing permits from a shared rate limiter state
+"""
+
+import os, threading
+from typing import Tuple
+
+
+class PermitLease:
+    """
+    Batch of single permits taken from a shared bucket at once and handed out by one process without touching it
+    The batch size follows demand: it doubles whenever a batch runs out before it would have expired, up to `maximum`,
+    and halves whenever one expires with permits left over, which should then be given back
+    """
+    def __init__(self, maximum: int, ttl: float = 0.1):
+        """
+        Args:
+            maximum: Largest batch size
+            ttl: Time in seconds a batch can be used for, bounding how long after being accounted a permit is used
+        """
+        self._maximum = maximum
+        self._ttl = ttl
+        self._ttl_ns = int(ttl * 1_000_000_000)
+        # Held by callers around take, fill and drain, and around refilling the batch from the shared state
+        self.lock = threading.Lock()
+        self.size = 1
+        self._left = 0
+        self._granted_at = 0
+        self._expires_at = 0
+        self._ran_out = False
+        self._pid = os.getpid()
+        self._filled_pid = None
+
+    def take(self, now: int) -> bool:
+        """
+        Hand out a permit of the current batch
+
+        Args:
+            now: Current monotonic time in nanoseconds
+
+        Returns:
+            True if a permit was available
+        """
+        if not self._left or now >= self._expires_at or self._pid != os.getpid():
+            return False
+        self._left -= 1
+        return True
+
+    def fill(self, granted_at: int, count: int) -> bool:
+        """
+        Start a new batch, after drain() took what was left of the previous one
+
+        Args:
+            granted_at: Monotonic time in nanoseconds the permits were granted at
+            count: Number of permits in the batch, besides the one the caller uses right away
+
+        Returns:
+            True for the first batch of this process, so the caller can arrange for its leftovers to be given back at exit
+        """
+        if self._ran_out and granted_at < self._expires_at:
+            self.size = min(self._maximum, self.size * 2)
+        self._left = count
+        self._granted_at = granted_at
+        self._expires_at = granted_at + self._ttl_ns
+        self._pid = os.getpid()
+        first = self._filled_pid != self._pid
+        self._filled_pid = self._pid
+        return first
+
+    def drain(self) -> Tuple[int, int]:
+        """
+        Empty the batch, shrinking the next one if permits were left over
+
+        Returns:
+            Tuple containing (time the left over permits were granted at, their number), which is 0 when
+            there are none or when they belong to the process this one was forked from
+        """
+        left = self._left if self._pid == os.getpid() else 0
+        self._left = 0
+        self._ran_out = not left
+        if left:
+            self.size = max(1, self.size // 2)
+        return self._granted_at, left
+
+    def __getstate__(self):
+        return {"maximum": self._maximum, "ttl": self._ttl}
+
+    def __setstate__(self, state):
+        self.__init__(state["maximum"], state["ttl"])
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+Kronos utilities for serving rate limiter waiters by priority
+"""
+
+import time, heapq, itertools, threading
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+class PriorityLanes:
+    """
+    Waiters of one process queued by priority class, of which only the first holds a reservation at any time
+    Classes are served either strictly in order, lowest first, or in proportion to their weights with start-time fair queuing
+    Queueing costs O(log n) and each grant wakes a single thread. A waiter overtaken by a more urgent one gives its
+    reservation back, so the newcomer is not held behind a grant time computed for another class
+    """
+    def __init__(self, weights: Optional[Sequence[float]] = None):
+        """
+        Args:
+            weights: Share of each class 0..n-1 under contention, None for strict priority
+        """
+        self._weights = weights
+        self._lock = threading.Lock()
+        self._heap: List[_Waiter] = []
+        self._sequence = itertools.count()
+        # Start-time fair queuing: virtual time of the last grant and finish tag of the last waiter of each class
+        self._virtual_time = 0.0
+        self._finish = [0.0] * len(weights) if weights else []
+        # Waiter the pending reservation was made for, its grant time and cost
+        self._held: Optional[Tuple[_Waiter, int, int]] = None
+
+    def check(self, priority: int) -> None:
+        """
+        Validate a priority class
+
+        Args:
+            priority: Priority class
+
+        Raises:
+            ValueError: If the class does not exist
+        """
+        if not self._weights:
+            if priority < 0:
+                raise ValueError(f"Invalid priority: {priority}. Priority must be at least 0")
+        elif not 0 <= priority < len(self._weights):
+            raise ValueError(f"Invalid priority: {priority}. Priority must be between 0 and {len(self._weights) - 1}")
+
+    def acquire(self, cost: int, priority: int, max_wait: Optional[int], reserve: Callable[[int, Optional[int], int], Tuple[int, int]], refund: Callable[[int, int], None]) -> Optional[int]:
+        """
+        Wait until every more urgent waiter of this process has been served and a reservation is due
+
+        Args:
+            cost: Number of permits
+            priority: Priority class
+            max_wait: Maximum wait in nanoseconds
+            reserve: Reserves (cost, max_wait, priority) from the shared state, returning (now, granted_at)
+            refund: Gives back (granted_at, cost) reserved but not used
+
+        Returns:
+            Nanoseconds from queueing until the grant time, 0 if served right away, or None if max_wait ran out
+        """
+        started = time.monotonic_ns()
+        deadline = None if max_wait is None else started + max_wait
+        waited = False
+        with self._lock:
+            waiter = _Waiter(self._key(cost, priority), threading.Condition(self._lock))
+            heapq.heappush(self._heap, waiter)
+            while True:
+                now = time.monotonic_ns()
+                wake_at = deadline
+                if self._top() is waiter:
+                    if self._held is not None and self._held[0] is not waiter:
+                        refund(self._held[1], self._held[2])
+                        self._held = None
+                    if self._held is None:
+                        now, granted_at = reserve(cost, None if deadline is None else max(0, deadline - now), priority)
+                        if deadline is not None and granted_at > deadline:
+                            self._leave(waiter)
+                            return None
+                        self._held = (waiter, granted_at, cost)
+
+                    granted_at = self._held[1]
+                    if granted_at <= now:
+                        self._held = None
+                        self._virtual_time = max(self._virtual_time, waiter.key[0]) if self._weights else 0.0
+                        self._leave(waiter)
+                        return granted_at - started if waited else 0
+                    wake_at = granted_at
+
+                elif deadline is not None and now >= deadline:
+                    self._leave(waiter)
+                    return None
+
+                waited = True
+                waiter.condition.wait(None if wake_at is None else (wake_at - now) / 1e9)
+
+    def try_acquire(self, cost: int, priority: int, reserve: Callable[[int, Optional[int], int], Tuple[int, int]]) -> bool:
+        """
+        Take permits right away, only when no waiter of this process is queued
+
+        Args:
+            cost: Number of permits
+            priority: Priority class
+            reserve: Reserves (cost, max_wait, priority) from the shared state, returning (now, granted_at)
+
+        Returns:
+            True if the permits were taken
+        """
+        with self._lock:
+            if self._top() is not None:
+                return False
+            now, granted_at = reserve(cost, 0, priority)
+            return granted_at <= now
+
+    def _key(self, cost: int, priority: int) -> Tuple[float, int]:
+        """
+        Order of a new waiter in the queue, with the lock held
+
+        Args:
+            cost: Number of permits
+            priority: Priority class
+
+        Returns:
+            Heap key, ties broken by arrival
+        """
+        if not self._weights:
+            return priority, next(self._sequence)
+        start = max(self._virtual_time, self._finish[priority])
+        self._finish[priority] = start + cost / self._weights[priority]
+        return start, next(self._sequence)
+
+    def _top(self) -> Optional["_Waiter"]:
+        """First live waiter, dropping those that left while queued"""
+        while self._heap and self._heap[0].left:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def _leave(self, waiter: "_Waiter") -> None:
+        """
+        Remove a waiter from the queue and wake the next one, with the lock held
+
+        Args:
+            waiter: Waiter leaving, served or not
+        """
+        waiter.left = True
+        top = self._top()
+        if top is not None:
+            top.condition.notify()
+
+    def __getstate__(self):
+        return {"weights": self._weights}
+
+    def __setstate__(self, state):
+        self.__init__(state["weights"])
+
+
+class _Waiter:
+    """
+    Thread queued in PriorityLanes
+    """
+    __slots__ = ("key", "condition", "left")
+
+    def __init__(self, key: Tuple[float, int], condition: threading.Condition):
+        self.key = key
+        self.condition = condition
+        self.left = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return self.key < other.key
\ No newline at end of file
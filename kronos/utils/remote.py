@@ -0,0 +1,254 @@
+"""
+Kronos utilities for the limiter server protocol and its client
+
+Every frame is little-endian and fixed-size:
+    request: op (u8), request id (u32), bucket id (u32), count (u32), maximum wait in nanoseconds (i64, -1 for none)
+    response: request id (u32), status (u8), count (u32), wait in nanoseconds (i64)
+An OPEN request is followed by `count` bytes of JSON configuration, at most MAX_PAYLOAD, and answers the bucket id in count.
+Waits are relative, so clients and server never need to agree on a clock
+"""
+
+import os, json, time, socket, struct, itertools, threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional, Tuple, Union
+
+from .lease import PermitLease
+
+Address = Union[str, Tuple[str, int]]
+
+REQUEST = struct.Struct("<BIIIq")
+RESPONSE = struct.Struct("<IBIq")
+MAX_PAYLOAD = 65536
+
+OP_OPEN = 1
+OP_RESERVE = 2
+OP_LEASE = 3
+
+STATUS_OK = 0
+STATUS_MISMATCH = 1
+STATUS_UNKNOWN_BUCKET = 2
+STATUS_INVALID = 3
+
+_ERRORS = {
+    STATUS_MISMATCH: "was opened on the server with a different configuration",
+    STATUS_UNKNOWN_BUCKET: "is unknown to the server",
+    STATUS_INVALID: "rejected an invalid request"
+}
+
+
+class LimiterClient:
+    """
+    Connection to a limiter server, shared by every thread of a process
+    Requests are pipelined: any number of them can be in flight at once, and a reader thread hands each
+    response to the thread waiting for it
+    """
+    _clients: Dict[Tuple[Address, int], "LimiterClient"] = {}
+    _clients_lock = threading.Lock()
+
+    def __init__(self, address: Address, timeout: float = 5.0):
+        """
+        Connect to the server
+
+        Args:
+            address: (host, port) tuple for TCP, or a UNIX socket path
+            timeout: Maximum time to wait for a response in seconds
+        """
+        self._timeout = timeout
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(address)
+        else:
+            self._socket = socket.create_connection(tuple(address), timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._socket.settimeout(None)
+
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self.closed = False
+        threading.Thread(target=self._read, name="kronos-limiter-client", daemon=True).start()
+
+    @classmethod
+    def connect(cls, address: Address) -> "LimiterClient":
+        """
+        Get the connection of this process to a server, opening it if needed
+        Forked children never reuse their parent's connection, whose reader thread did not survive the fork
+
+        Args:
+            address: (host, port) tuple for TCP, or a UNIX socket path
+
+        Returns:
+            Open client
+        """
+        key = (address if isinstance(address, str) else tuple(address), os.getpid())
+        with cls._clients_lock:
+            client = cls._clients.get(key)
+            if client is None or client.closed:
+                client = cls._clients[key] = cls(address)
+            return client
+
+    def request(self, op: int, bucket_id: int, count: int, max_wait: Optional[int] = None, payload: bytes = b"") -> Tuple[int, int, int]:
+        """
+        Send a request and wait for its response
+
+        Args:
+            op: Operation code
+            bucket_id: Bucket the request applies to
+            count: Number of permits, or payload length for OP_OPEN
+            max_wait: Maximum wait in nanoseconds, None for no limit
+            payload: Bytes following the frame
+
+        Returns:
+            Tuple containing (status, count, wait)
+
+        Raises:
+            ConnectionError: If the connection to the server is lost or the server does not answer in time
+        """
+        request_id = next(self._ids) & 0xFFFFFFFF
+        future = Future()
+        self._pending[request_id] = future
+        frame = REQUEST.pack(op, request_id, bucket_id, count, -1 if max_wait is None else max_wait) + payload
+        try:
+            with self._send_lock:
+                self._socket.sendall(frame)
+        except OSError as e:
+            self._pending.pop(request_id, None)
+            self._fail(e)
+            raise ConnectionError(f"Lost connection to the limiter server: {e}") from e
+        try:
+            return future.result(self._timeout)
+        except FutureTimeoutError:
+            # A late response finds no pending request and is dropped
+            self._pending.pop(request_id, None)
+            raise ConnectionError(f"Limiter server did not answer within {self._timeout} seconds") from None
+
+    def _read(self) -> None:
+        """Hand each response to its pending request until the connection is lost"""
+        buffer = b""
+        try:
+            while True:
+                chunk = self._socket.recv(65536)
+                if not chunk:
+                    raise ConnectionError("Limiter server closed the connection")
+                buffer += chunk
+                complete = len(buffer) - len(buffer) % RESPONSE.size
+                for request_id, status, count, wait in RESPONSE.iter_unpack(buffer[:complete]):
+                    future = self._pending.pop(request_id, None)
+                    if future is not None:
+                        future.set_result((status, count, wait))
+                buffer = buffer[complete:]
+        except OSError as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception) -> None:
+        """
+        Mark the connection as lost and fail every pending request
+
+        Args:
+            error: Cause of the failure
+        """
+        self.closed = True
+        while self._pending:
+            _, future = self._pending.popitem()
+            future.set_exception(ConnectionError(f"Lost connection to the limiter server: {error}"))
+
+    def close(self) -> None:
+        """Close the connection"""
+        self.closed = True
+        self._socket.close()
+
+
+class RemoteBucket:
+    """
+    Bucket held by a limiter server, reserving permits in a single round-trip
+    Single permits can be leased in batches: the server grants up to `lease` permits available right away and
+    the surplus is served locally, so a burst of acquires only costs one round-trip per batch. Unused permits lapse
+    """
+    def __init__(self, address: Address, name: str, config: dict, lease: int = 1, lease_ttl: float = 0.1):
+        """
+        Args:
+            address: (host, port) tuple for TCP, or a UNIX socket path
+            name: Bucket name, shared by every client using the same limit
+            config: Bucket configuration, which must be identical for every client of the name
+            lease: Largest number of permits requested at once for single-permit reservations, see PermitLease
+            lease_ttl: Time in seconds after which unused leased permits lapse
+        """
+        self._address = address
+        self._name = name
+        self._config = config
+        self._lease = PermitLease(lease, lease_ttl) if lease > 1 else None
+        self._lease_size = lease
+        self._lease_ttl = lease_ttl
+
+        self._client = None
+        self._bucket_id = None
+
+    def _connection(self) -> Tuple[LimiterClient, int]:
+        """
+        Get the client of this process and the id of the bucket on the server, opening it if needed
+
+        Returns:
+            Tuple containing (client, bucket id)
+
+        Raises:
+            ValueError: If the bucket exists on the server with a different configuration
+        """
+        client = LimiterClient.connect(self._address)
+        if client is not self._client:
+            payload = json.dumps({"name": self._name, **self._config}, sort_keys=True).encode()
+            status, bucket_id, _ = client.request(OP_OPEN, 0, len(payload), None, payload)
+            self._check(status)
+            self._client, self._bucket_id = client, bucket_id
+        return self._client, self._bucket_id
+
+    def reserve(self, cost: int, max_wait: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Reserve the next `cost` permits, from the local lease when possible
+
+        Args:
+            cost: Number of permits
+            max_wait: Maximum wait in nanoseconds, permits due later than that are not reserved
+
+        Returns:
+            Tuple containing (now, granted_at) in local monotonic nanoseconds
+        """
+        if cost == 1 and self._lease is not None:
+            with self._lease.lock:
+                now = time.monotonic_ns()
+                if self._lease.take(now):
+                    return now, now
+
+                # The server keeps no trace of which permits were leased, so the ones left over lapse
+                self._lease.drain()
+                client, bucket_id = self._connection()
+                status, granted, wait = client.request(OP_LEASE, bucket_id, self._lease.size, max_wait)
+                self._check(status)
+                now = time.monotonic_ns()
+                if granted and wait <= 0:
+                    self._lease.fill(now, granted - 1)
+            return now, now + wait
+
+        client, bucket_id = self._connection()
+        status, _, wait = client.request(OP_RESERVE, bucket_id, cost, max_wait)
+        self._check(status)
+        now = time.monotonic_ns()
+        return now, now + wait
+
+    def _check(self, status: int) -> None:
+        """
+        Raise the error a response status stands for
+
+        Args:
+            status: Response status
+
+        Raises:
+            ValueError: If the status is not STATUS_OK
+        """
+        if status != STATUS_OK:
+            raise ValueError(f"Remote bucket {self._name} {_ERRORS.get(status, f'failed with status {status}')}")
+
+    def __getstate__(self):
+        return {"address": self._address, "name": self._name, "config": self._config, "lease": self._lease_size, "lease_ttl": self._lease_ttl}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Kronos utilities for saving rate limiter state to a file and restoring it after a restart
+
+A snapshot holds a header of five signed 64-bit slots (magic number, number of slots, signature of the layout,
+monotonic and wall-clock time it was taken at) followed by the state slots. Times in the state are monotonic,
+which restarts at every boot, so they are moved by how much the wall-clock to monotonic offset changed since
+"""
+
+import os, weakref, tempfile, threading
+from array import array
+from typing import MutableSequence, Optional, Tuple
+
+from .buckets import Bucket
+
+_MAGIC = 0x4B52534E4150
+_HEADER = 5
+
+
+def save_snapshot(path: str, storage, size: int, signature: int, clock) -> None:
+    """
+    Write the state to a file, atomically replacing the previous snapshot
+
+    Args:
+        path: Snapshot file path
+        storage: Storage holding the state in its first `size` slots
+        size: Number of state slots
+        signature: Fingerprint of the slot layout
+        clock: Clock the state times refer to
+    """
+    with storage.lock:
+        header = array("q", [_MAGIC, size, signature, clock.monotonic_ns(), int(clock.time() * 1_000_000_000)])
+        data = header.tobytes() + array("q", storage.slots[:size]).tobytes()
+
+    fd, temp_path = tempfile.mkstemp(prefix=".kronos-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def load_snapshot(path: str, bucket: Bucket, signature: int, clock) -> Optional[MutableSequence[int]]:
+    """
+    Read a snapshot, with its times moved onto the current monotonic clock
+
+    Args:
+        path: Snapshot file path
+        bucket: Algorithm the state belongs to
+        signature: Fingerprint of the slot layout
+        clock: Clock the restored times should refer to
+
+    Returns:
+        State slots, or None if there is no snapshot or it was taken with another configuration
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+
+    slots = array("q")
+    if len(data) != (_HEADER + bucket.size) * 8:
+        return None
+    slots.frombytes(data)
+    if (slots[0], slots[1], slots[2]) != (_MAGIC, bucket.size, signature):
+        return None
+
+    monotonic_ns, wall_ns = slots[3], slots[4]
+    del slots[:_HEADER]
+    bucket.shift(slots, (wall_ns - monotonic_ns) - (int(clock.time() * 1_000_000_000) - clock.monotonic_ns()))
+    return slots
+
+
+class SnapshotWriter:
+    """
+    Saves the state of a limiter every `interval` seconds and when it is closed, collected or the interpreter exits
+    Only the process that created it writes: copies pickled into other processes, or inherited by forked ones, stay idle
+    """
+    def __init__(self, path: str, storage, size: int, signature: int, clock, interval: Optional[float] = None):
+        """
+        Args:
+            path: Snapshot file path
+            storage: Storage holding the state in its first `size` slots
+            size: Number of state slots
+            signature: Fingerprint of the slot layout
+            clock: Clock the state times refer to
+            interval: Seconds between periodic snapshots, None to only save at the end
+        """
+        args = (path, storage, size, signature, clock)
+        self._stop = threading.Event()
+        self._finalizer = weakref.finalize(self, _save_last, args, self._stop, os.getpid())
+        if interval:
+            threading.Thread(target=_save_periodically, args=(args, self._stop, interval), name="kronos-snapshot", daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the periodic snapshots and save a last one"""
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self._finalizer = None
+
+
+def _save_periodically(args: Tuple, stop: threading.Event, interval: float) -> None:
+    """
+    Save a snapshot every `interval` seconds until stopped
+
+    Args:
+        args: Arguments of save_snapshot
+        stop: Event set when the writer is closed
+        interval: Seconds between snapshots
+    """
+    while not stop.wait(interval):
+        save_snapshot(*args)
+
+
+def _save_last(args: Tuple, stop: threading.Event, pid: int) -> None:
+    """
+    Stop the periodic snapshots and save a last one, from the creating process only
+
+    Args:
+        args: Arguments of save_snapshot
+        stop: Event stopping the periodic snapshots
+        pid: Process that created the writer
+    """
+    stop.set()
+    if os.getpid() == pid:
+        save_snapshot(*args)
\ No newline at end of file
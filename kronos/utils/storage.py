@@ -0,0 +1,500 @@
+"""
+Kronos utilities for rate limiter state storage
+"""
+
+import os, mmap, time, hashlib, tempfile, weakref, threading, multiprocessing
+from array import array
+from typing import Optional
+from multiprocessing import shared_memory
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class LocalStorage:
+    """
+    Fixed-size array of signed 64-bit slots guarded by a threading lock, for use within a single process
+    """
+    def __init__(self, size: int):
+        """
+        Allocate the slots
+
+        Args:
+            size: Number of 64-bit slots to allocate
+        """
+        self.lock = threading.Lock()
+        self.slots = memoryview(array("q", bytes(size * 8)))
+
+    def semaphore(self, value: int) -> threading.BoundedSemaphore:
+        """
+        Create a semaphore shared by the users of this storage
+
+        Args:
+            value: Initial semaphore value
+
+        Returns:
+            Semaphore usable across threads
+        """
+        return threading.BoundedSemaphore(value)
+
+    def close(self) -> None:
+        """Nothing to release for process-local state"""
+        pass
+
+
+class SharedMemoryStorage:
+    """
+    Fixed-size array of signed 64-bit slots kept in a shared memory block and guarded by a process-shared lock
+    Processes started from the owner inherit it, or reattach to the same block by name when it is pickled
+    Its lock belongs to a multiprocessing context and can only be shared with processes started from that same context
+    """
+    def __init__(self, size: int, context=None):
+        """
+        Create the shared memory block
+
+        Args:
+            size: Number of 64-bit slots to allocate
+            context: Multiprocessing context the processes using the storage are started from, the default one if None
+        """
+        self._size = size
+        self._context = multiprocessing if context is None else context
+        self._shm = shared_memory.SharedMemory(create=True, size=size * 8)
+        self.lock = self._context.Lock()
+        self.slots = self._shm.buf[:size * 8].cast("q")
+        self._finalizer = weakref.finalize(self, _release_shared_memory, self._shm, self.slots, os.getpid())
+
+    def semaphore(self, value: int):
+        """
+        Create a semaphore shared by the users of this storage
+
+        Args:
+            value: Initial semaphore value
+
+        Returns:
+            Semaphore usable across processes started from this one, with the context of the storage
+        """
+        return self._context.BoundedSemaphore(value)
+
+    @property
+    def name(self) -> str:
+        """Name of the underlying shared memory block"""
+        return self._shm.name
+
+    def close(self) -> None:
+        """Detach from the block, unlinking it if this is the creating process"""
+        self._finalizer()
+
+    def __getstate__(self):
+        return {"name": self._shm.name, "size": self._size, "lock": self.lock}
+
+    def __setstate__(self, state):
+        self._size = state["size"]
+        self._context = multiprocessing
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self.lock = state["lock"]
+        self.slots = self._shm.buf[:self._size * 8].cast("q")
+        # Attached copies never unlink the block, only the creator does
+        self._finalizer = weakref.finalize(self, _release_shared_memory, self._shm, self.slots, None)
+
+
+class ManagerStorage:
+    """
+    Fixed-size array of slots held by the multiprocessing.Manager server shared by every limiter of this process
+    Slower than shared memory since every slot access is a round-trip to the server, but its proxies can be pickled freely
+    Where processes are forked, by default or with the given context, the slots are allocated right away so forked
+    children share them. Otherwise nothing is allocated until the slots are first used, so limiters that are never used
+    never start the server, and a child forked before that fails loudly instead of starting a server of its own
+    """
+    _manager = None
+    _manager_pid = None
+    _manager_users = 0
+    _manager_lock = threading.Lock()
+
+    def __init__(self, size: int, context=None):
+        """
+        Prepare the slots, allocated on the shared manager server now if processes are forked, or when first used
+
+        Args:
+            size: Number of slots to allocate
+            context: Multiprocessing context the processes using the storage are started from, the default one if None.
+                The server is started with the context of the first storage of the process that allocates its slots
+        """
+        self._size = size
+        self._context = context
+        self._pid = os.getpid()
+        self._owner = False
+        self._lock = None
+        self._slots = None
+        if _forks(context):
+            self._attach()
+
+    @property
+    def lock(self):
+        """Lock proxy guarding the slots"""
+        if self._lock is None:
+            self._attach()
+        return self._lock
+
+    @property
+    def slots(self):
+        """List proxy holding the slots"""
+        if self._slots is None:
+            self._attach()
+        return self._slots
+
+    def _attach(self) -> None:
+        """
+        Allocate the slots on the shared manager server, starting it if this is its first user in this process
+
+        Raises:
+            RuntimeError: If this process was forked from the one that created the storage before it was allocated
+        """
+        cls = type(self)
+        with cls._manager_lock:
+            if self._slots is not None:
+                return
+            _check_forked(self._pid)
+            if cls._manager is None or cls._manager_pid != os.getpid():
+                cls._manager = (multiprocessing if self._context is None else self._context).Manager()
+                cls._manager_pid = os.getpid()
+                cls._manager_users = 0
+            cls._manager_users += 1
+            self._owner = True
+            self._lock = cls._manager.Lock()
+            self._slots = cls._manager.list([0] * self._size)
+
+    def semaphore(self, value: int) -> "_ManagerSemaphore":
+        """
+        Create a semaphore shared by the users of this storage
+
+        Args:
+            value: Initial semaphore value
+
+        Returns:
+            Semaphore held by the manager server, allocated when first used
+        """
+        return _ManagerSemaphore(self, value)
+
+    def close(self) -> None:
+        """Release the slots, shutting down the shared manager server once its last user in this process is closed"""
+        cls = type(self)
+        with cls._manager_lock:
+            if not self._owner:
+                return
+            self._owner = False
+            cls._manager_users -= 1
+            if cls._manager_users == 0 and cls._manager_pid == os.getpid():
+                cls._manager.shutdown()
+                cls._manager = None
+
+    def __getstate__(self):
+        return {"lock": self.lock, "slots": self.slots}
+
+    def __setstate__(self, state):
+        self._size = len(state["slots"])
+        self._context = None
+        self._owner = False
+        self._lock = state["lock"]
+        self._slots = state["slots"]
+
+
+class _ManagerSemaphore:
+    """
+    Bounded semaphore proxy of a ManagerStorage, allocated on the manager server when first used
+    """
+    def __init__(self, storage: ManagerStorage, value: int):
+        """
+        Args:
+            storage: Storage whose manager server holds the semaphore
+            value: Initial semaphore value
+        """
+        self._storage = storage
+        self._value = value
+        self._pid = os.getpid()
+        self._proxy = None
+        if _forks(storage._context):
+            self._attach()
+
+    def _attach(self) -> None:
+        """
+        Allocate the semaphore on the manager server of its storage, starting it if needed
+
+        Raises:
+            RuntimeError: If this process was forked from the one that created the semaphore before it was allocated
+        """
+        self._storage._attach()
+        with ManagerStorage._manager_lock:
+            if self._proxy is None:
+                _check_forked(self._pid)
+                self._proxy = ManagerStorage._manager.BoundedSemaphore(self._value)
+
+    def _semaphore(self):
+        """Semaphore proxy, allocated if needed"""
+        if self._proxy is None:
+            self._attach()
+        return self._proxy
+
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Take a slot
+
+        Args:
+            blocking: Whether to wait for a slot
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if a slot was taken
+        """
+        return self._semaphore().acquire(blocking, timeout)
+
+    def release(self) -> None:
+        """Give a slot back"""
+        self._semaphore().release()
+
+    def __getstate__(self):
+        return {"proxy": self._semaphore()}
+
+    def __setstate__(self, state):
+        self._storage = None
+        self._value = None
+        self._proxy = state["proxy"]
+
+
+class FileStorage:
+    """
+    Fixed-size array of signed 64-bit slots in a memory-mapped file, guarded by an exclusive flock on that file
+    Any process opening the same path shares the slots, whether or not it is related to the creator, and a
+    process dying while holding the lock releases it
+    The slots hold monotonic times, which restart at every boot, so a file left by a previous boot is reset when opened
+    """
+    # Header slots: magic number, number of slots, signature of the layout stored in them, boot id (0 if unknown)
+    # and wall-clock minus monotonic time at creation, which identifies the boot when there is no boot id
+    _MAGIC = 0x4B524F4E4F53
+    _HEADER = 5
+    # Drift of the wall-clock to monotonic offset still considered the same boot
+    _BOOT_TOLERANCE_NS = 60_000_000_000
+
+    def __init__(self, path: str, size: int, signature: int = 0):
+        """
+        Open the state file, creating it zero-filled if it does not exist
+
+        Args:
+            path: State file path, preferably on a memory-backed filesystem such as /dev/shm
+            size: Number of 64-bit slots
+            signature: Fingerprint of the slot layout, so processes configured differently cannot share a file
+
+        Raises:
+            RuntimeError: If fcntl is unavailable on this platform
+            ValueError: If the file exists with another size or signature
+        """
+        if fcntl is None:
+            raise RuntimeError("FileStorage requires fcntl, which is unavailable on this platform")
+
+        self._path = path
+        self._size = size
+        self._signature = signature
+        self.lock = _FileLock(path)
+
+        length = (self._HEADER + size) * 8
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, length)
+            elif os.fstat(fd).st_size != length:
+                raise ValueError(f"State file {path} holds {os.fstat(fd).st_size // 8 - self._HEADER} slots, expected {size}")
+            self._mmap = mmap.mmap(fd, length)
+
+            view = memoryview(self._mmap).cast("q")
+            boot_id, offset = _boot_id(), time.time_ns() - time.monotonic_ns()
+            if view[0] == 0:
+                view[0], view[1], view[2], view[3], view[4] = self._MAGIC, size, signature, boot_id, offset
+            elif (view[0], view[1], view[2]) != (self._MAGIC, size, signature):
+                view.release()
+                self._mmap.close()
+                raise ValueError(f"State file {path} was created for a different configuration")
+            else:
+                if view[3] and boot_id:
+                    same_boot = view[3] == boot_id
+                else:
+                    same_boot = abs(view[4] - offset) <= self._BOOT_TOLERANCE_NS
+                if not same_boot:
+                    # Left by a previous boot, its times are meaningless on the current monotonic clock
+                    for i in range(self._HEADER, self._HEADER + size):
+                        view[i] = 0
+                    view[3], view[4] = boot_id, offset
+        finally:
+            # The map keeps a duplicate of the descriptor, which would otherwise keep holding the lock
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+        self.slots = view[self._HEADER:]
+        self._finalizer = weakref.finalize(self, _release_file, self._mmap, view, self.slots, self.lock)
+
+    @property
+    def path(self) -> str:
+        """Path of the state file"""
+        return self._path
+
+    def semaphore(self, value: int):
+        """
+        Semaphores cannot be shared with unrelated processes
+
+        Raises:
+            ValueError: Always
+        """
+        raise ValueError("Concurrency limits are not supported by the file backend")
+
+    def close(self) -> None:
+        """Unmap the file, which is left in place for the other processes using it"""
+        self._finalizer()
+
+    def __getstate__(self):
+        return {"path": self._path, "size": self._size, "signature": self._signature}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["size"], state["signature"])
+
+
+class _FileLock:
+    """
+    Exclusive flock on a file, opened once per process since forked children share their parent's descriptors
+    and flock does not exclude holders of the same descriptor. A thread lock serializes the threads of a process
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path: File to lock
+        """
+        self._path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            if self._pid != os.getpid():
+                self._fd = os.open(self._path, os.O_RDWR)
+                self._pid = os.getpid()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def close(self) -> None:
+        """Close the descriptor opened by this process"""
+        if self._fd is not None and self._pid == os.getpid():
+            os.close(self._fd)
+        self._fd = None
+        self._pid = None
+
+
+def state_file_path(name: str) -> str:
+    """
+    Resolve the state file of a named limiter
+
+    Args:
+        name: Limiter name, or a path if it contains a path separator
+
+    Returns:
+        Path under /dev/shm when available, the temporary directory otherwise
+    """
+    if os.sep in name:
+        return name
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"kronos-{name}")
+
+
+def fingerprint(*parts) -> int:
+    """
+    Stable signed 64-bit fingerprint of a configuration, identical in every process
+
+    Args:
+        parts: Values describing the configuration
+
+    Returns:
+        Fingerprint
+    """
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), "little", signed=True)
+
+
+def _boot_id() -> int:
+    """
+    Identify the current boot
+
+    Returns:
+        Fingerprint of the kernel boot id, or 0 where there is none
+    """
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as file:
+            return fingerprint(file.read().strip())
+    except OSError:
+        return 0
+
+
+def _release_file(file_map: mmap.mmap, view: memoryview, slots: memoryview, lock: _FileLock) -> None:
+    """
+    Release a file mapping
+
+    Args:
+        file_map: Memory map of the state file
+        view: Typed view over the whole map
+        slots: Typed view over the slots
+        lock: File lock holding a descriptor of this process
+    """
+    slots.release()
+    view.release()
+    file_map.close()
+    lock.close()
+
+
+def _release_shared_memory(shm: shared_memory.SharedMemory, slots: memoryview, owner_pid) -> None:
+    """
+    Release a shared memory mapping
+
+    Args:
+        shm: Shared memory block
+        slots: Typed view over the block, which must be released before closing it
+        owner_pid: PID of the creating process, the only one allowed to unlink the block
+    """
+    slots.release()
+    shm.close()
+    if owner_pid == os.getpid():
+        shm.unlink()
+
+
+def _forks(context=None) -> bool:
+    """
+    Tell whether processes of a context are started by forking, without fixing the default start method
+
+    Args:
+        context: Multiprocessing context, the default one if None
+
+    Returns:
+        True if the start method is, or will default to, "fork"
+    """
+    if context is not None:
+        return context.get_start_method() == "fork"
+    return (multiprocessing.get_start_method(allow_none=True) or multiprocessing.get_all_start_methods()[0]) == "fork"
+
+
+def _check_forked(pid: int) -> None:
+    """
+    Refuse to allocate manager state in a child forked before its creator allocated it, which would not be shared
+
+    Args:
+        pid: Process that created the state
+
+    Raises:
+        RuntimeError: If this is another process
+    """
+    if pid != os.getpid():
+        raise RuntimeError("Manager backend state was not allocated before this process was forked, so it cannot be shared. Use the limiter once before forking, or pass it to spawned processes")
\ No newline at end of file